@@ -2,70 +2,196 @@
 
 # Importa as bibliotecas necessárias:
 # socket: para comunicação de rede (TCP) com o orquestrador.
-# json: para serializar (transformar em string) e desserializar (transformar de volta em objeto) os dados das tarefas.
-# argparse: para criar uma interface de linha de comando amigável (ex: 'python -m client.main login ...').
-# os: para interagir com o sistema operacional, especificamente para verificar se o arquivo de token existe.
+# sys: para ler os argumentos da linha de comando no atalho do comando 'status'.
+# os: para interagir com o sistema operacional, especificamente para consultar o arquivo de token.
+# functools: para guardar em memória o token já lido do arquivo.
+# time: para o relógio monotônico usado ao lembrar que o arquivo de token não existe.
+#
+# O 'argparse' e o 'asyncio' são importados apenas dentro das funções que os usam: eles são
+# relativamente pesados de carregar, e o comando mais frequente ('status') não precisa de nenhum dos dois.
 import socket
-import json
-import argparse
+import sys
 import os
+import functools
+import time
+# encode_basestring_ascii: a rotina do módulo 'json' que converte uma string em um literal JSON escapado.
+from json.encoder import encode_basestring_ascii
+# SimpleNamespace: um objeto simples com atributos, usado no lugar do resultado do argparse no atalho do 'status'.
+from types import SimpleNamespace
 
 # Importa as configurações de host e porta do arquivo config.py.
 # Isso centraliza as configurações, facilitando a manutenção.
 from config import ORCHESTRATOR_HOST, CLIENT_PORT
+# Funções de serialização compartilhadas (usam o 'orjson' quando disponível e o 'json' padrão caso contrário)
+# e de envio/recebimento de mensagens com cabeçalho de tamanho.
+# USE_MSGPACK indica se as mensagens são enviadas em MessagePack (WIRE_FORMAT = "msgpack" e a biblioteca
+# instalada). Nesse caso os formatos pré-montados em JSON abaixo não valem, e as requisições passam pelo 'encode'.
+from shared.communication import encode, decode, DecodeError, send_frame, recv_frame, pack_frame, recv_frame_async, USE_MSGPACK
 
 # Define o nome do arquivo onde o token de autenticação será salvo localmente.
 # Usar um arquivo oculto (começando com '.') é uma convenção comum.
 TOKEN_FILE = ".api_token"
 
+# Por quanto tempo (em segundos) a ausência do arquivo de token é lembrada antes de consultá-lo de novo.
+# Evita consultas repetidas ao sistema de arquivos quando o usuário ainda não fez login.
+TOKEN_MISSING_TTL = 1.0
+# Momento (relógio monotônico) em que o arquivo de token foi procurado e não encontrado.
+_token_missing_at = None
+
 # Função para salvar o token de autenticação em um arquivo local.
 def save_token(token):
+    global _token_missing_at
     # Abre o arquivo em modo de escrita ('w'). Se o arquivo não existir, ele é criado.
     with open(TOKEN_FILE, "w") as f:
         # Escreve o token recebido no arquivo.
         f.write(token)
+    # O arquivo agora existe: a ausência lembrada deixa de valer.
+    _token_missing_at = None
+
+# Lê o token do arquivo. O resultado fica guardado em memória (lru_cache) associado à "versão"
+# do arquivo (data de modificação, tamanho e inode), então o arquivo só é lido de novo quando muda.
+@functools.lru_cache(maxsize=1)
+def _read_token(file_version):
+    # Abre o arquivo em modo de leitura ('r').
+    with open(TOKEN_FILE, "r") as f:
+        # Lê o conteúdo do arquivo, remove espaços em branco extras (como quebras de linha) e o retorna.
+        return f.read().strip()
 
 # Função para carregar o token de autenticação do arquivo local.
 def load_token():
-    # Verifica se o arquivo de token realmente existe no diretório.
-    if os.path.exists(TOKEN_FILE):
-        # Abre o arquivo em modo de leitura ('r').
-        with open(TOKEN_FILE, "r") as f:
-            # Lê o conteúdo do arquivo, remove espaços em branco extras (como quebras de linha) e o retorna.
-            return f.read().strip()
+    global _token_missing_at
+    # Se o arquivo foi procurado há pouco tempo e não existia, responde sem consultá-lo de novo.
+    if _token_missing_at is not None and time.monotonic() - _token_missing_at < TOKEN_MISSING_TTL:
+        return None
+    # Um único 'stat' informa se o arquivo existe e se ele mudou desde a última leitura.
+    # Tentar diretamente e tratar a ausência do arquivo evita uma consulta extra (os.path.exists)
+    # e a condição de corrida entre verificar e abrir o arquivo.
+    try:
+        st = os.stat(TOKEN_FILE)
+        token = _read_token((st.st_mtime_ns, st.st_size, st.st_ino))
     # Se o arquivo não existir, retorna None, indicando que o usuário não está logado.
-    return None
+    except FileNotFoundError:
+        _token_missing_at = time.monotonic()
+        return None
+    _token_missing_at = None
+    return token
+
+# Mantém uma única conexão TCP com o orquestrador, reaproveitada por todas as requisições.
+# Abrir um socket novo a cada chamada obriga a pagar o "aperto de mão" (handshake) do TCP
+# toda vez, o que custa mais do que o envio da própria mensagem.
+class _Client:
+    # O construtor apenas guarda o endereço; a conexão só é aberta na primeira requisição.
+    def __init__(self, address):
+        self.address = address
+        self._sock = None
+
+    # Retorna a conexão atual, criando-a se ainda não existir.
+    def _connect(self):
+        if self._sock is None:
+            sock = socket.create_connection(self.address)
+            # Desativa o algoritmo de Nagle: as mensagens são pequenas e devem sair imediatamente.
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Pede ao sistema operacional para verificar periodicamente se a conexão ociosa ainda está viva.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._sock = sock
+        return self._sock
 
-# Função genérica para enviar qualquer tipo de requisição ao orquestrador.
-def send_request(request):
+    # Fecha e descarta a conexão atual (ela será recriada na próxima requisição).
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # Envia uma requisição (já convertida para bytes) e espera pela resposta correspondente.
+    def request(self, payload: bytes):
+        # Se a conexão já existia, o orquestrador pode tê-la fechado por inatividade.
+        # Nesse caso, uma única nova tentativa é feita com uma conexão nova.
+        reused = self._sock is not None
+        while True:
+            sock = self._connect()
+            try:
+                # Cada mensagem é enviada com um cabeçalho de tamanho, permitindo várias na mesma conexão.
+                # 'send_frame' entrega o cabeçalho e o conteúdo ao kernel juntos, sem copiar o conteúdo.
+                send_frame(sock, payload)
+                response = recv_frame(sock)
+                if response is None:
+                    raise ConnectionResetError("O orquestrador encerrou a conexão.")
+                # Converte os bytes JSON recebidos de volta para um dicionário Python e os retorna.
+                return decode(response)
+            except (ConnectionResetError, BrokenPipeError):
+                self.close()
+                if not reused:
+                    raise
+                reused = False
+
+# Conexão compartilhada por todo o processo do cliente.
+_client = _Client((ORCHESTRATOR_HOST, CLIENT_PORT))
+
+# Envia ao orquestrador uma requisição já serializada em bytes e retorna a resposta como dicionário.
+def send_payload(payload: bytes):
     try:
-        # Cria um socket TCP/IP.
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            # Conecta-se ao endereço e porta do orquestrador definidos no config.py.
-            s.connect((ORCHESTRATOR_HOST, CLIENT_PORT))
-            # Converte o dicionário Python (request) para uma string JSON e a codifica para bytes antes de enviar.
-            s.sendall(json.dumps(request).encode('utf-8'))
-            # Espera por uma resposta do servidor (até 4096 bytes).
-            response = s.recv(4096).decode('utf-8')
-            # Converte a string JSON recebida de volta para um dicionário Python e a retorna.
-            return json.loads(response)
+        return _client.request(payload)
     # Trata o erro caso o orquestrador não esteja rodando ou a conexão seja recusada.
     except ConnectionRefusedError:
         return {"error": "Não foi possível conectar ao orquestrador."}
+    # Trata o erro caso a conexão caia antes de a resposta chegar.
+    except (ConnectionResetError, BrokenPipeError):
+        return {"error": "A conexão com o orquestrador foi encerrada."}
     # Trata o erro caso a resposta do servidor não seja um JSON válido.
-    except json.JSONDecodeError:
+    except DecodeError:
          return {"error": "Resposta inválida recebida do servidor."}
 
+# --- Requisições pré-montadas ---
+# O cliente envia apenas três formatos de requisição (login, submit_task e task_status), sempre
+# com as mesmas chaves. Em vez de montar um dicionário e passá-lo pelo serializador genérico,
+# cada formato tem seu próprio codificador: as chaves e a estrutura já ficam prontas em bytes,
+# e só os valores informados pelo usuário são convertidos (e escapados) a cada chamada.
+
+# Converte uma string para um literal JSON (com aspas e caracteres especiais escapados).
+# 'encode_basestring_ascii' é a rotina em C que o próprio módulo 'json' usa internamente para strings.
+def _json_str(value: str) -> bytes:
+    return encode_basestring_ascii(value).encode('ascii')
+
+# Monta a requisição de login em JSON.
+def encode_login_request(username: str, password: str) -> bytes:
+    if USE_MSGPACK:
+        return encode({"action": "login", "username": username, "password": password})
+    return b'{"action":"login","username":' + _json_str(username) + b',"password":' + _json_str(password) + b'}'
+
+# Monta (e guarda em memória) o início fixo da requisição de submissão para um token.
+@functools.lru_cache(maxsize=1)
+def _submit_prefix(token: str) -> bytes:
+    return b'{"action":"submit_task","token":' + _json_str(token) + b',"data":{"description":'
+
+# Monta a requisição de submissão de tarefa em JSON.
+# O modo "sleep" é o padrão do worker e não precisa ser enviado.
+def encode_submit_request(token: str, description, duration, mode="sleep") -> bytes:
+    # O formato pré-montado só cobre descrição e modo em texto e duração inteira. Outros tipos (que podem
+    # vir de um arquivo do 'submit-batch') passam pelo serializador genérico, assim como tudo em MessagePack.
+    if USE_MSGPACK or type(description) is not str or type(duration) is not int or type(mode) is not str:
+        data = {"description": description, "duration": duration}
+        if mode != "sleep":
+            data["mode"] = mode
+        return encode({"action": "submit_task", "token": token, "data": data})
+    tail = b'}}' if mode == "sleep" else b',"mode":' + _json_str(mode) + b'}}'
+    return _submit_prefix(token) + _json_str(description) + b',"duration":' + str(duration).encode('ascii') + tail
+
+# Monta (e guarda em memória) o início fixo da requisição de status para um token.
+@functools.lru_cache(maxsize=1)
+def _status_prefix(token: str) -> bytes:
+    return b'{"action":"task_status","token":' + _json_str(token) + b',"task_id":'
+
+# Monta a requisição de status completa em JSON.
+def encode_status_request(token: str, task_id: str) -> bytes:
+    if USE_MSGPACK:
+        return encode({"action": "task_status", "token": token, "task_id": task_id})
+    return _status_prefix(token) + _json_str(task_id) + b'}'
+
 # Função que lida com o comando 'login'.
 def handle_login(args):
-    # Monta o dicionário da requisição com a ação e as credenciais fornecidas pelo usuário.
-    request = {
-        "action": "login",
-        "username": args.username,
-        "password": args.password
-    }
-    # Envia a requisição de login para o orquestrador.
-    response = send_request(request)
+    # Monta a requisição (já em bytes) com a ação e as credenciais fornecidas pelo usuário
+    # e a envia para o orquestrador.
+    response = send_payload(encode_login_request(args.username, args.password))
     # Se a resposta contiver um "token", o login foi bem-sucedido.
     if "token" in response:
         # Salva o token recebido localmente para uso em futuras requisições.
@@ -84,15 +210,9 @@ def handle_submit(args):
         print("Você precisa fazer login primeiro. Use: client login <user> <pass>")
         return
     
-    # Monta o dicionário da requisição, incluindo o token para autenticação
-    # e os dados da tarefa (descrição e duração).
-    request = {
-        "action": "submit_task",
-        "token": token,
-        "data": {"description": args.description, "duration": args.duration}
-    }
-    # Envia a requisição para submeter a tarefa.
-    response = send_request(request)
+    # Monta a requisição (já em bytes), incluindo o token para autenticação
+    # e os dados da tarefa (descrição, duração e modo), e a envia.
+    response = send_payload(encode_submit_request(token, args.description, args.duration, args.mode))
     # Se a resposta contiver um "task_id", a tarefa foi aceita pelo orquestrador.
     if "task_id" in response:
         print(f"Tarefa submetida com sucesso! ID da Tarefa: {response['task_id']}")
@@ -108,14 +228,9 @@ def handle_status(args):
         print("Você precisa fazer login primeiro.")
         return
         
-    # Monta a requisição para verificar o status, incluindo o token e o ID da tarefa.
-    request = {
-        "action": "task_status",
-        "token": token,
-        "task_id": args.task_id
-    }
-    # Envia a requisição.
-    response = send_request(request)
+    # Monta a requisição para verificar o status (já em bytes), incluindo o token e o ID da tarefa,
+    # e a envia.
+    response = send_payload(encode_status_request(token, args.task_id))
     
     # Se o servidor retornar um erro, exibe-o.
     if "error" in response:
@@ -127,11 +242,115 @@ def handle_status(args):
             print(f"{key.capitalize():<20}: {value}")
         print("------------------------\n")
 
+# Envia várias requisições pela mesma conexão, sem esperar cada resposta antes de mandar a próxima
+# (pipelining), e retorna as respostas na mesma ordem das requisições.
+async def _send_pipelined(payloads):
+    import asyncio
+    reader, writer = await asyncio.open_connection(ORCHESTRATOR_HOST, CLIENT_PORT)
+
+    # Escreve todas as requisições na conexão.
+    async def write_all():
+        for payload in payloads:
+            writer.write(pack_frame(payload))
+            # 'drain' só bloqueia se o buffer de envio estiver cheio.
+            await writer.drain()
+
+    # Lê as respostas enquanto as requisições ainda estão sendo enviadas. Ler e escrever ao mesmo
+    # tempo evita que os dois lados fiquem travados esperando o outro esvaziar seu buffer.
+    async def read_all():
+        responses = []
+        for _ in payloads:
+            response = await recv_frame_async(reader)
+            if response is None:
+                raise ConnectionResetError("O orquestrador encerrou a conexão.")
+            responses.append(decode(response))
+        return responses
+
+    try:
+        _, responses = await asyncio.gather(write_all(), read_all())
+        return responses
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+# Função que lida com o comando 'submit-batch' para enviar várias tarefas de uma vez.
+# O arquivo tem uma tarefa por linha, em JSON (formato JSONL), por exemplo:
+#   {"description": "Processar relatório", "duration": 10}
+def handle_submit_batch(args):
+    # asyncio: para enviar várias tarefas de uma vez pela mesma conexão, com um único loop de eventos.
+    import asyncio
+    # validate_task_data: a mesma verificação feita pelo orquestrador, para que linhas inválidas nem sejam enviadas.
+    from shared.models import validate_task_data
+    token = load_token()
+    if not token:
+        print("Você precisa fazer login primeiro. Use: client login <user> <pass>")
+        return
+
+    # Lê as tarefas do arquivo, ignorando linhas em branco, junto com o número de cada linha.
+    try:
+        with open(args.file, "rb") as f:
+            entries = [(lineno, decode(line)) for lineno, line in enumerate(f, 1) if line.strip()]
+        if not all(isinstance(task, dict) for _, task in entries):
+            raise DecodeError("uma das linhas não é um objeto JSON")
+    except FileNotFoundError:
+        print(f"Arquivo não encontrado: {args.file}")
+        return
+    except DecodeError as e:
+        print(f"Arquivo inválido (cada linha deve ser um objeto JSON): {e}")
+        return
+
+    # Separa as linhas com duração ou modo inválidos: elas são ignoradas e relatadas no resumo.
+    tasks, rejected = [], []
+    for lineno, task in entries:
+        error = validate_task_data(task)
+        if error is None:
+            tasks.append(task)
+        else:
+            rejected.append((lineno, error))
+
+    # Monta todas as requisições de submissão de uma vez.
+    payloads = [
+        encode_submit_request(token, task.get("description", ""), task.get("duration", 5), task.get("mode", "sleep"))
+        for task in tasks
+    ]
+
+    # Envia todas as tarefas por uma única conexão, com um único loop de eventos.
+    # Se nenhuma linha for válida, não há por que abrir a conexão.
+    try:
+        responses = asyncio.run(_send_pipelined(payloads)) if payloads else []
+    except ConnectionRefusedError:
+        print("Erro ao submeter tarefas: Não foi possível conectar ao orquestrador.")
+        return
+    except (ConnectionResetError, BrokenPipeError):
+        print("Erro ao submeter tarefas: A conexão com o orquestrador foi encerrada.")
+        return
+
+    # Exibe o resultado de cada tarefa, na ordem do arquivo.
+    accepted = 0
+    for task, response in zip(tasks, responses):
+        if "task_id" in response:
+            accepted += 1
+            print(f"Tarefa '{task.get('description', '')}' submetida. ID da Tarefa: {response['task_id']}")
+        else:
+            print(f"Erro ao submeter tarefa '{task.get('description', '')}': {response.get('error', 'desconhecido')}")
+    for lineno, error in rejected:
+        print(f"Linha {lineno} ignorada: {error}")
+    print(f"{accepted} de {len(entries)} tarefas submetidas com sucesso.")
+
 # Função principal que configura a interface de linha de comando.
 def main():
+    # Atalho para o comando mais usado em scripts: 'status <id>'. Ele é tratado diretamente, sem
+    # montar o parser completo do 'argparse' (com todos os subcomandos) a cada execução.
+    argv = sys.argv[1:]
+    if len(argv) == 2 and argv[0] == "status" and not argv[1].startswith("-"):
+        handle_status(SimpleNamespace(task_id=argv[1]))
+        return
+
+    # argparse: para criar uma interface de linha de comando amigável (ex: 'python -m client.main login ...').
+    import argparse
     # Cria o parser principal.
     parser = argparse.ArgumentParser(description="Cliente para a plataforma de tarefas distribuídas.")
-    # Cria subparsers para lidar com os diferentes comandos (login, submit, status).
+    # Cria subparsers para lidar com os diferentes comandos (login, submit, status, submit-batch).
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Configuração do comando 'login'.
@@ -144,6 +363,8 @@ def main():
     parser_submit = subparsers.add_parser("submit", help="Submete uma nova tarefa.")
     parser_submit.add_argument("description", type=str, help="Descrição da tarefa.")
     parser_submit.add_argument("-d", "--duration", type=int, default=5, help="Duração simulada da tarefa em segundos.")
+    parser_submit.add_argument("-m", "--mode", choices=["sleep", "cpu"], default="sleep",
+                               help="Tipo de trabalho simulado: apenas esperar (sleep) ou usar a CPU (cpu).")
     parser_submit.set_defaults(func=handle_submit) # Associa o comando 'submit' à função handle_submit.
     
     # Configuração do comando 'status'.
@@ -151,6 +372,11 @@ def main():
     parser_status.add_argument("task_id", type=str, help="O ID da tarefa a ser verificada.")
     parser_status.set_defaults(func=handle_status) # Associa o comando 'status' à função handle_status.
 
+    # Configuração do comando 'submit-batch'.
+    parser_batch = subparsers.add_parser("submit-batch", help="Submete várias tarefas lidas de um arquivo JSONL.")
+    parser_batch.add_argument("file", type=str, help="Arquivo com uma tarefa por linha, ex: {\"description\": \"...\", \"duration\": 5}.")
+    parser_batch.set_defaults(func=handle_submit_batch) # Associa o comando 'submit-batch' à função handle_submit_batch.
+
     # Analisa os argumentos fornecidos na linha de comando.
     args = parser.parse_args()
     # Chama a função que foi associada ao comando digitado pelo usuário (ex: handle_login).
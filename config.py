@@ -1,15 +1,24 @@
 # config.py
 
-import logging
+import hashlib
 
 # --- Configurações de Rede ---
 ORCHESTRATOR_HOST = 'localhost'
 # Porta para comunicação com Clientes (TCP)
 CLIENT_PORT = 50051
+# Tempo em segundos que uma conexão de cliente pode ficar ociosa antes de ser fechada pelo orquestrador
+CLIENT_IDLE_TIMEOUT = 30.0
 # Porta para comunicação com Workers (receber heartbeats e enviar tarefas)
 WORKER_PORT = 50052
 # Porta para enviar tarefas aos Workers (TCP)
 TASK_PORT = 60000
+# Formato das mensagens trocadas pela rede: "json" (padrão) ou "msgpack" (binário, requer 'pip install msgpack').
+# Quem recebe detecta o formato automaticamente, então componentes com formatos diferentes continuam se entendendo.
+WIRE_FORMAT = "json"
+# Tamanho máximo, em bytes, de uma mensagem TCP (o valor informado no cabeçalho de tamanho).
+# O buffer da mensagem é alocado a partir do cabeçalho, então um valor corrompido ou malicioso
+# poderia pedir até 4 GB de memória; mensagens maiores que o limite encerram a conexão.
+MAX_FRAME_SIZE = 16 * 1024 * 1024 # 16 MB
 
 # --- Configurações do Orquestrador de Backup e Failover ---
 # Grupo multicast para sincronização de estado e heartbeats do primário
@@ -19,6 +28,12 @@ MULTICAST_PORT = 5007
 PRIMARY_TIMEOUT = 5.0 # 5 segundos
 # Intervalo em que o primário envia seu estado e heartbeat
 SYNC_INTERVAL = 2.0 # 2 segundos
+# A cada quantos ciclos de sincronização o primário envia o estado completo em vez de apenas as alterações.
+# Um backup que acabou de iniciar ou perdeu alguma atualização volta a ficar sincronizado no snapshot seguinte.
+SYNC_FULL_EVERY = 5
+# Tamanho máximo, em bytes, de cada datagrama de sincronização. Um datagrama UDP não passa de ~64 KB;
+# um estado maior que isso (ex: milhares de tarefas finalizadas) é dividido em vários datagramas.
+SYNC_MAX_DATAGRAM = 60_000
 
 # --- Configurações dos Workers ---
 # Lista de workers conhecidos. Na prática, isso poderia ser dinâmico.
@@ -31,6 +46,23 @@ WORKERS_ADDRESSES = [
 HEARTBEAT_INTERVAL = 2.0
 # Tempo em segundos sem um heartbeat para considerar um worker inativo/morto
 WORKER_TIMEOUT = 5.0
+# Tempo máximo em segundos para abrir a conexão TCP com um worker e para cada envio de tarefa por ela.
+# Um worker inalcançável é descartado nesse prazo, em vez de travar a distribuição das tarefas.
+WORKER_SEND_TIMEOUT = 2.0
+# Número máximo de tarefas pendentes retiradas da fila e distribuídas de uma vez pelo orquestrador.
+# Os workers de todo o lote são escolhidos com uma única chamada ao balanceador de carga.
+DISPATCH_BATCH = 32
+# Tempo em microssegundos que o kernel fica consultando a placa de rede (busy polling) antes de
+# colocar o worker para dormir à espera de uma tarefa (opção SO_BUSY_POLL, apenas no Linux).
+# Reduz a latência de entrega das tarefas ao custo de CPU. 0 desativa. Valores acima do limite do
+# sistema exigem permissão de administrador (CAP_NET_ADMIN).
+WORKER_BUSY_POLL_US = 0
+
+# --- Retenção de Tarefas Finalizadas ---
+# Tempo em segundos que uma tarefa concluída (ou com falha) continua disponível para consulta de status
+COMPLETED_TASK_TTL = 3600.0 # 1 hora
+# Número máximo de tarefas finalizadas mantidas em memória (as mais antigas são descartadas primeiro)
+MAX_COMPLETED_TASKS = 10_000
 
 # --- Configurações de Segurança ---
 # Usuários e senhas para autenticação básica
@@ -41,6 +73,20 @@ USERS = {
 # Chave "secreta" para gerar tokens simples. Em um sistema real, use algo mais robusto.
 SECRET_KEY = "sua-chave-super-secreta"
 
+# Gera o hash (BLAKE2b com a chave secreta) de uma senha. O BLAKE2b é mais rápido que o SHA-256
+# para entradas pequenas, e usar a chave secreta impede comparar os hashes com tabelas prontas.
+def hash_password(password: str) -> bytes:
+    return hashlib.blake2b(password.encode(), digest_size=16, key=SECRET_KEY.encode()).digest()
+
+# Tabela com o hash da senha de cada usuário, calculada uma única vez na importação.
+# O login compara hashes (com 'hmac.compare_digest') em vez das senhas em texto puro.
+USERS_HASHED = {user: hash_password(password) for user, password in USERS.items()}
+
 # --- Configurações de Logging ---
 LOGGING_FORMAT = '%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
-logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
\ No newline at end of file
+
+# Configura o logging. É chamada explicitamente pelos pontos de entrada do orquestrador e do worker;
+# o cliente de linha de comando quase não gera logs, então não paga o custo de importar e configurar o módulo.
+def configure_logging():
+    import logging
+    logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
@@ -1,8 +1,10 @@
 # orchestrator/lamport_clock.py
 
-# Importa a biblioteca 'threading' para garantir que as operações no relógio
-# sejam seguras em um ambiente com múltiplas threads (thread-safe).
+# Importa a biblioteca 'threading' para garantir que as atualizações do relógio sejam seguras
+# em um ambiente com múltiplas threads (thread-safe).
 import threading
+# Importa a biblioteca 'itertools' para usar o 'itertools.count', um contador implementado em C.
+import itertools
 
 # Define a classe que implementa o Relógio Lógico de Lamport.
 # Este relógio é usado para estabelecer uma ordem causal parcial entre eventos em um sistema distribuído.
@@ -10,39 +12,52 @@ class LamportClock:
     # O construtor da classe.
     def __init__(self):
         # Inicializa o tempo lógico do relógio em 0.
+        # Este atributo guarda o último timestamp emitido e serve apenas para consulta (get_time).
         self.time = 0
-        # Cria um "Lock" (cadeado) para evitar que múltiplas threads modifiquem
-        # o valor do tempo ao mesmo tempo, o que poderia causar inconsistências.
+        # O contador que efetivamente gera os timestamps. O próximo valor emitido será 1.
+        self._counter = itertools.count(1)
+        # Cria um "Lock" (cadeado) que protege o contador. 'update' e 'set_time' trocam o contador por
+        # um novo; sem o Lock, um 'increment' simultâneo poderia tirar um valor do contador antigo,
+        # menor que o novo tempo, e o relógio deixaria de ser crescente.
         self._lock = threading.Lock()
 
     # Método para ser chamado quando um evento interno ocorre no processo (ex: criar uma tarefa).
     def increment(self):
-        # O 'with self._lock:' garante que o bloco de código seguinte seja executado
-        # por apenas uma thread de cada vez. O lock é liberado automaticamente no final.
         with self._lock:
             # A regra 1 do algoritmo de Lamport: incrementa o contador local.
-            self.time += 1
+            t = next(self._counter)
+            # Registra o valor para consulta.
+            self.time = t
             # Retorna o novo timestamp.
-            return self.time
+            return t
 
     # Método para ser chamado ao receber uma mensagem de outro processo que contém um timestamp.
     def update(self, received_time):
         with self._lock:
             # A regra 2 do algoritmo de Lamport: o tempo local é atualizado para ser o
             # máximo entre o seu valor atual e o timestamp recebido, e então incrementado.
-            self.time = max(self.time, received_time) + 1
+            # 'next(self._counter)' já é "valor atual + 1", mesmo que 'self.time' esteja defasado.
+            # Uma comparação direta evita a chamada à função 'max()'.
+            t = next(self._counter)
+            if received_time >= t:
+                t = received_time + 1
+            self.time = t
+            # Reposiciona o contador para continuar a partir do novo valor.
+            self._counter = itertools.count(t + 1)
             # Retorna o novo timestamp atualizado.
-            return self.time
+            return t
 
-    # Método para obter o valor atual do relógio de forma segura.
+    # Método para obter o valor atual do relógio.
+    # A leitura de um único atributo é atômica, então não precisa de Lock.
     def get_time(self):
-        with self._lock:
-            # Retorna o valor atual da variável 'time'.
-            return self.time
+        # Retorna o valor atual da variável 'time'.
+        return self.time
 
     # Método para definir um novo valor para o relógio, usado pelo orquestrador de backup.
     def set_time(self, new_time):
         # Quando o backup assume ou sincroniza o estado, ele precisa ajustar seu relógio
         # para o valor mais recente conhecido no sistema para manter a consistência.
         with self._lock:
-            self.time = new_time
\ No newline at end of file
+            self.time = new_time
+            # O próximo evento local recebe o timestamp seguinte ao valor definido.
+            self._counter = itertools.count(new_time + 1)
@@ -1,55 +1,99 @@
 # orchestrator/load_balancer.py
 
 # Importa as bibliotecas necessárias:
-# threading: para o Lock, garantindo que a lista de workers não seja modificada e lida ao mesmo tempo.
-# typing.List: para anotações de tipo, melhorando a legibilidade do código.
+# threading: para o Lock, garantindo que duas atualizações da lista de workers não aconteçam ao mesmo tempo,
+#            e para a Condition, que permite esperar até haver um worker disponível.
+# bisect: para inserir e localizar workers na tupla ordenada por busca binária, sem reordená-la.
+# itertools: para o 'itertools.cycle', que percorre a tupla de workers em círculo e cujo 'next()'
+#            é atômico no CPython (implementado em C).
+# typing.List e typing.Tuple: para anotações de tipo, melhorando a legibilidade do código.
 import threading
-from typing import List
+import bisect
+import itertools
+from typing import List, Tuple
 
 # Define a classe que implementa a política de balanceamento de carga Round Robin.
 # Essa política distribui as tarefas sequencialmente entre os workers disponíveis, em um ciclo.
 class RoundRobinLoadBalancer:
     # O construtor da classe.
     def __init__(self):
-        # 'self.workers': uma lista que armazenará os IDs dos workers ativos.
-        self.workers: List[str] = []
-        # 'self.current_index': um ponteiro que aponta para o próximo worker a receber uma tarefa.
-        self.current_index = 0
-        # 'self.lock': um Lock para garantir que as operações na lista de workers sejam thread-safe.
+        # 'self.workers': uma tupla (imutável) com os IDs dos workers ativos.
+        # Como ela nunca é modificada, apenas substituída por uma nova, quem lê não precisa de lock:
+        # a troca do atributo é uma única operação atômica no CPython.
+        self.workers: Tuple[str, ...] = ()
+        # 'self._members': os mesmos IDs em um conjunto, para comparar rapidamente (sem ordenar)
+        # se a lista recebida em 'update_workers' é igual à atual.
+        self._members = frozenset()
+        # 'self._cycle': um iterador que devolve os workers da tupla em sequência, voltando ao primeiro
+        # depois do último. 'next()' nele é executado inteiramente em C, sem ser interrompido por outra thread.
+        self._cycle = itertools.cycle(self.workers)
+        # 'self.lock': um Lock usado apenas pelas atualizações da lista de workers.
         self.lock = threading.Lock()
+        # Condição sinalizada sempre que a lista de workers passa a ter algum worker.
+        # Permite esperar por um worker disponível sem consultar a lista repetidamente.
+        self._available = threading.Condition(self.lock)
 
-    # Método para atualizar a lista de workers ativos.
-    # É chamado periodicamente pelo orquestrador quando a lista de workers muda (alguém entra ou sai).
+    # Publica uma nova tupla ordenada de workers e o ciclo correspondente.
+    # Deve ser chamado com o lock adquirido.
+    def _publish(self, ring: Tuple[str, ...]):
+        self.workers = ring
+        self._members = frozenset(ring)
+        # O novo ciclo é montado uma única vez aqui e publicado com uma única atribuição.
+        self._cycle = itertools.cycle(ring)
+        # Acorda quem estiver esperando por um worker.
+        if ring:
+            self._available.notify_all()
+
+    # Método para atualizar a lista completa de workers ativos.
+    # É chamado periodicamente pelo orquestrador, na maioria das vezes com a mesma lista de antes.
     def update_workers(self, workers: List[str]):
-        # Adquire o lock para modificar a lista de workers com segurança.
+        # Compara como conjunto antes de ordenar: se ninguém entrou nem saiu, não há nada a fazer,
+        # e o ciclo atual é mantido para não reiniciar a distribuição a partir do primeiro worker.
+        members = frozenset(workers)
+        if members == self._members:
+            return
+        # Ordena a lista de workers. Isso garante uma ordem consistente, evitando que a
+        # sequência de distribuição mude drasticamente se a lista for recebida em ordens diferentes.
+        # A ordenação é feita fora do lock, que fica retido apenas pela publicação (algumas atribuições).
+        ring = tuple(sorted(members))
+        # Adquire o lock para que duas atualizações simultâneas não se misturem.
+        with self.lock:
+            self._publish(ring)
+
+    # Adiciona um único worker (ex: quando ele envia seu primeiro heartbeat), sem reordenar a lista toda.
+    def add_worker(self, worker_id: str):
+        with self.lock:
+            if worker_id in self._members:
+                return
+            # 'insort' encontra a posição por busca binária e insere mantendo a ordem.
+            ring = list(self.workers)
+            bisect.insort(ring, worker_id)
+            self._publish(tuple(ring))
+
+    # Remove um único worker (ex: quando ele é considerado inativo).
+    def remove_worker(self, worker_id: str):
         with self.lock:
-            # Ordena a lista de workers. Isso garante uma ordem consistente, evitando que a
-            # sequência de distribuição mude drasticamente se a lista for recebida em ordens diferentes.
-            self.workers = sorted(workers)
-            # Se o índice atual ficou inválido (ex: a lista de workers diminuiu),
-            # ele é resetado para 0 para evitar um erro de "index out of bounds".
-            if self.current_index >= len(self.workers):
-                self.current_index = 0
-    
+            if worker_id not in self._members:
+                return
+            # Localiza a posição por busca binária e monta a nova tupla sem esse worker.
+            i = bisect.bisect_left(self.workers, worker_id)
+            self._publish(self.workers[:i] + self.workers[i + 1:])
+
     # Método principal que retorna o ID do próximo worker que deve receber uma tarefa.
+    # Não usa lock: é apenas um 'next()' no ciclo pré-montado, sem índice nem operação de módulo.
     def get_next_worker(self) -> str | None:
-        # Adquire o lock para ler a lista de workers e o índice com segurança.
-        with self.lock:
-            # Se não houver workers ativos na lista, retorna None.
-            if not self.workers:
-                return None
-            
-            # Checagem de segurança extra para o índice, caso a lista tenha sido esvaziada.
-            if self.current_index >= len(self.workers):
-                self.current_index = 0
-
-            # Pega o ID do worker na posição atual do índice.
-            worker = self.workers[self.current_index]
-            
-            # A mágica do Round Robin: avança o índice para a próxima posição.
-            # O operador de módulo (%) faz com que o índice volte a 0 quando
-            # atinge o final da lista, criando o efeito circular.
-            self.current_index = (self.current_index + 1) % len(self.workers)
-            
-            # Retorna o ID do worker escolhido.
-            return worker
\ No newline at end of file
+        # Se não houver workers ativos, o ciclo está vazio e o valor padrão None é retornado.
+        return next(self._cycle, None)
+
+    # Espera até haver pelo menos um worker ativo, por no máximo 'timeout' segundos.
+    # Retorna True se houver algum worker ao final da espera.
+    def wait_for_workers(self, timeout=None) -> bool:
+        with self._available:
+            return self._available.wait_for(lambda: self.workers, timeout)
+
+    # Versão em lote de 'get_next_worker': retorna os próximos 'n' workers de uma só vez.
+    # Útil quando há várias tarefas pendentes para distribuir: uma única chamada substitui 'n' chamadas.
+    def get_next_workers(self, n: int) -> List[str]:
+        # 'islice' consome 'n' itens do ciclo em um laço implementado em C.
+        # Se não houver workers ativos, o ciclo está vazio e a lista retornada também.
+        return list(itertools.islice(self._cycle, n))
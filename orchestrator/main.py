@@ -3,19 +3,73 @@
 # --- Importações de Bibliotecas Padrão ---
 import socket  # Para comunicação de rede (TCP, UDP, Multicast)
 import threading  # Para executar tarefas concorrentes (ex: ouvir clientes e workers ao mesmo tempo)
-import json  # Para serializar e desserializar dados (converter dict para string e vice-versa)
 import time  # Para pausas (sleep) e timestamps
 import hashlib  # Para gerar tokens de autenticação seguros (hash)
+import hmac  # Para gerar os tokens (HMAC) e comparar hashes em tempo constante
 import uuid  # Para gerar IDs únicos para as tarefas
 import sys  # Para acessar argumentos da linha de comando (ex: --backup)
+import os  # Para consultar o número de CPUs disponíveis
 import struct  # Para empacotar dados para a configuração de multicast
+import logging  # Para registrar os eventos do orquestrador
+import queue  # Para repassar as mensagens UDP recebidas às threads que as interpretam
+import asyncio  # Para atender os clientes e ouvir o primário com um laço de eventos, sem uma thread por conexão
 
 # --- Importações do Projeto ---
 from config import * # Importa todas as configurações do arquivo config.py
 from orchestrator.lamport_clock import LamportClock  # Importa o relógio lógico
-from orchestrator.state_manager import StateManager  # Importa o gerenciador de estado
+from orchestrator.state_manager import StateManager, TASK_STATUS_FIELDS  # Importa o gerenciador de estado
 from orchestrator.load_balancer import RoundRobinLoadBalancer  # Importa o balanceador de carga
-from shared.models import Task  # Importa o modelo de dados para uma Tarefa
+from shared.models import Task, validate_task_data  # Importa o modelo de dados para uma Tarefa e sua validação
+from shared.communication import encode, decode, DecodeError, send_frame, recv_frame_async, pack_frame  # Serialização e mensagens com tamanho
+
+# A chave secreta em bytes, convertida uma única vez, para assinar os tokens.
+_SECRET_BYTES = SECRET_KEY.encode()
+
+# Hash usado no lugar do hash guardado quando o usuário não existe. A senha recebida é comparada
+# com ele do mesmo jeito, para que o tempo de resposta não revele quais usuários existem.
+_DUMMY_PASSWORD_HASH = hash_password("")
+
+# Formato do heartbeat enviado ao backup: apenas o timestamp, como um número de ponto flutuante de 8 bytes.
+# Fica pré-compilado aqui para não ser interpretado a cada envio.
+_HEARTBEAT_TS = struct.Struct("!d")
+
+# Cabeçalho de cada parte de um estado dividido em vários datagramas (mensagem tipo 4):
+# número da transferência, índice da parte e total de partes.
+_STATE_CHUNK = struct.Struct("!IHH")
+
+# Respostas de erro que nunca mudam: já serializadas e com o cabeçalho de tamanho, uma única vez aqui,
+# para serem enviadas direto com 'sendall'. Requisições inválidas (ex: sem autenticação) não custam
+# nenhuma serialização.
+_ERR_AUTH_REQUIRED = pack_frame(encode({"error": "Autenticação necessária"}))
+_ERR_BAD_TOKEN = pack_frame(encode({"error": "Token inválido ou expirado"}))
+_ERR_BAD_CREDS = pack_frame(encode({"error": "Credenciais inválidas"}))
+_ERR_NO_TASK = pack_frame(encode({"error": "Tarefa não encontrada"}))
+
+# A confirmação de envio de tarefa só muda no ID, que é sempre um UUID com 36 caracteres ASCII.
+# A resposta é serializada uma vez com um ID de mesmo tamanho no lugar e dividida em volta dele;
+# depois, basta colocar o ID verdadeiro entre as duas partes. Como o tamanho é o mesmo, isso vale
+# tanto para JSON quanto para MessagePack (que guarda o tamanho do texto antes dele).
+_TASK_ID_PLACEHOLDER = "#" * 36
+_SUBMIT_ACK_PREFIX, _SUBMIT_ACK_SUFFIX = encode(
+    {"status": "Tarefa recebida", "task_id": _TASK_ID_PLACEHOLDER}
+).split(_TASK_ID_PLACEHOLDER.encode())
+
+# Adapta o 'StreamWriter' do asyncio à interface de socket usada pelos handlers das requisições
+# ('sendall'), para que eles funcionem sem saber se a conexão é atendida por um laço de eventos.
+# 'write' apenas coloca os dados no buffer de envio, sem bloquear; quem esvazia o buffer é o laço de eventos.
+class _StreamConn:
+    __slots__ = ("sendall",)
+
+    def __init__(self, writer):
+        self.sendall = writer.write
+
+# Recebe os datagramas multicast do primário (usado pelo backup) e os repassa ao orquestrador.
+class _SyncProtocol(asyncio.DatagramProtocol):
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+
+    def datagram_received(self, data, addr):
+        self.orchestrator.handle_sync_message(data)
 
 # A classe principal que representa o "cérebro" do sistema.
 class Orchestrator:
@@ -25,12 +79,30 @@ class Orchestrator:
         self.state_manager = StateManager()
         self.lamport_clock = LamportClock()
         self.load_balancer = RoundRobinLoadBalancer()
+
+        # Os tokens dependem apenas do usuário e da chave secreta, então são calculados uma única vez aqui.
+        # Assim, validar um token ou descobrir seu dono é uma simples consulta em dicionário,
+        # sem calcular nenhum hash durante o atendimento das requisições.
+        self._user_to_token = {user: self.generate_token(user) for user in USERS}
+        self._token_to_user = {token: user for user, token in self._user_to_token.items()}
+
+        # Conexões TCP abertas com cada worker, reaproveitadas para enviar várias tarefas
+        # sem refazer o handshake a cada envio. Formato: { 'worker_id': socket }
+        self._worker_conns = {}
+        self._worker_conns_lock = threading.Lock()
+
+        # Fila entre a thread que recebe as mensagens UDP dos workers e as threads que as interpretam.
+        # 'SimpleQueue' é implementada em C e não tem limite de tamanho.
+        self._udp_q = queue.SimpleQueue()
         
         # Define o papel (role) do orquestrador com base no argumento da linha de comando.
         self.role = "BACKUP" if is_backup else "PRIMARY"
         
         # Guarda o timestamp do último "sinal de vida" recebido do primário (relevante para o backup).
         self.last_primary_heartbeat = time.time()
+        # Partes recebidas do snapshot que está chegando dividido em vários datagramas (relevante para o backup).
+        # Formato: (número da transferência, lista de partes, com None nas que ainda faltam).
+        self._snapshot_parts = None
         logging.info(f"Orquestrador iniciando no modo: {self.role}")
 
         # Inicia os serviços correspondentes ao seu papel.
@@ -46,6 +118,9 @@ class Orchestrator:
         # 'daemon=True' faz com que as threads terminem quando o programa principal for encerrado.
         threading.Thread(target=self.listen_for_clients, daemon=True, name="ClientListener").start()
         threading.Thread(target=self.listen_for_workers, daemon=True, name="WorkerListener").start()
+        # Duas threads interpretam as mensagens dos workers recebidas pela 'listen_for_workers'.
+        for i in range(2):
+            threading.Thread(target=self.handle_worker_messages, daemon=True, name=f"WorkerParser-{i}").start()
         threading.Thread(target=self.distribute_tasks, daemon=True, name="TaskDistributor").start()
         threading.Thread(target=self.monitor_workers, daemon=True, name="WorkerMonitor").start()
         threading.Thread(target=self.sync_state_to_backup, daemon=True, name="StateSyncer").start()
@@ -58,107 +133,153 @@ class Orchestrator:
         threading.Thread(target=self.listen_for_sync, daemon=True, name="BackupListener").start()
 
     # Thread que ouve por conexões de clientes (TCP).
+    # Cada thread de aceitação roda um laço de eventos do asyncio, que atende todas as suas conexões
+    # sem criar uma thread por cliente: enquanto um cliente não envia nada, o laço atende os outros.
+    # Com SO_REUSEPORT, cada thread abre o seu próprio socket na mesma porta e o kernel distribui
+    # as novas conexões entre elas, em vez de todas disputarem um único 'accept()'.
     def listen_for_clients(self):
-        # Cria um socket TCP.
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            # Associa o socket ao endereço e porta definidos em 'config.py'.
-            s.bind((ORCHESTRATOR_HOST, CLIENT_PORT))
-            # Coloca o socket em modo de escuta.
-            s.listen()
-            logging.info(f"Ouvindo clientes em {ORCHESTRATOR_HOST}:{CLIENT_PORT}")
-            # Loop infinito para aceitar novas conexões.
-            while True:
-                conn, addr = s.accept()
-                # Para cada cliente que se conecta, uma nova thread é criada para lidar com ele.
-                # Isso permite que o orquestrador atenda múltiplos clientes simultaneamente.
-                threading.Thread(target=self.handle_client, args=(conn, addr), name=f"Client-{addr[0]}").start()
+        thread_count = min(os.cpu_count() or 1, 4)
+        # A primeira thread de aceitação roda nesta mesma thread; as demais são criadas aqui.
+        for i in range(1, thread_count):
+            threading.Thread(target=self._accept_loop, args=(thread_count,), daemon=True, name=f"ClientListener-{i}").start()
+        self._accept_loop(thread_count)
 
-    # Função que processa a requisição de um único cliente.
-    def handle_client(self, conn, addr):
+    # Laço de aceitação executado por cada uma das threads de 'listen_for_clients'.
+    def _accept_loop(self, thread_count):
+        asyncio.run(self._serve_clients(thread_count))
+
+    async def _serve_clients(self, thread_count):
+        # Cria o socket TCP, associado ao endereço e porta definidos em 'config.py', com uma fila
+        # de conexões pendentes limitada. Cada nova conexão é atendida por 'handle_client'.
+        server = await asyncio.start_server(
+            self.handle_client, ORCHESTRATOR_HOST, CLIENT_PORT,
+            reuse_port=True, backlog=2 * thread_count
+        )
+        logging.info(f"Ouvindo clientes em {ORCHESTRATOR_HOST}:{CLIENT_PORT}")
+        async with server:
+            await server.serve_forever()
+
+    # Função que atende uma conexão de cliente.
+    # A conexão é mantida aberta e pode transportar várias requisições em sequência,
+    # cada uma precedida por um cabeçalho com o seu tamanho.
+    async def handle_client(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        conn = _StreamConn(writer)
         try:
-            with conn:
-                # Recebe os dados enviados pelo cliente.
-                request_data = conn.recv(4096).decode('utf-8')
-                if not request_data: return
-                
-                # Converte a string JSON para um dicionário Python.
-                request = json.loads(request_data)
-                
-                # --- Lógica de Autenticação ---
-                # Se a requisição não tem um token, ela só pode ser de login.
-                if "token" not in request:
-                    if request.get("action") == "login":
-                        self.handle_login(conn, request)
-                    else:
-                        # Se não for login e não tiver token, é um acesso não autorizado.
-                        conn.sendall(json.dumps({"error": "Autenticação necessária"}).encode())
-                    return
-                
-                # Se tem um token, verifica se ele é válido.
-                if not self.verify_token(request["token"]):
-                    conn.sendall(json.dumps({"error": "Token inválido ou expirado"}).encode())
-                    return
-                
-                # --- Roteamento de Ações Autenticadas ---
-                # Se o token é válido, verifica qual ação o cliente quer realizar.
-                action = request.get("action")
-                if action == "submit_task":
-                    self.handle_submit_task(conn, request)
-                elif action == "task_status":
-                    self.handle_task_status(conn, request)
+            while True:
+                # Recebe a próxima mensagem completa enviada pelo cliente.
+                # A conexão é fechada se o cliente ficar muito tempo sem enviar nada.
+                request_data = await asyncio.wait_for(recv_frame_async(reader), CLIENT_IDLE_TIMEOUT)
+                # None indica que o cliente encerrou a conexão.
+                if request_data is None: return
+
+                # Converte os bytes JSON para um dicionário Python.
+                request = decode(request_data)
+                # O processamento em si é rápido (consultas ao estado e uma resposta curta) e roda
+                # direto no laço de eventos. A resposta vai para o buffer de envio da conexão.
+                self.handle_request(conn, request)
+                # Espera o buffer de envio esvaziar, caso o cliente esteja lendo devagar.
+                await writer.drain()
+        # Conexões ociosas são simplesmente encerradas.
+        except asyncio.TimeoutError:
+            return
         # Trata erros comuns de rede e JSON para evitar que o orquestrador quebre.
-        except (json.JSONDecodeError, ConnectionResetError, BrokenPipeError) as e:
+        except (DecodeError, ConnectionResetError, BrokenPipeError) as e:
             logging.error(f"Erro ao lidar com cliente {addr}: {e}")
+        finally:
+            writer.close()
+
+    # Função que processa uma única requisição de um cliente.
+    def handle_request(self, conn, request):
+        # --- Lógica de Autenticação ---
+        # Se a requisição não tem um token, ela só pode ser de login.
+        if "token" not in request:
+            if request.get("action") == "login":
+                self.handle_login(conn, request)
+            else:
+                # Se não for login e não tiver token, é um acesso não autorizado.
+                conn.sendall(_ERR_AUTH_REQUIRED)
+            return
+
+        # Se tem um token, verifica se ele é válido.
+        if not self.verify_token(request["token"]):
+            conn.sendall(_ERR_BAD_TOKEN)
+            return
+
+        # --- Roteamento de Ações Autenticadas ---
+        # Se o token é válido, verifica qual ação o cliente quer realizar.
+        action = request.get("action")
+        if action == "submit_task":
+            self.handle_submit_task(conn, request)
+        elif action == "task_status":
+            self.handle_task_status(conn, request)
+        else:
+            # Toda requisição precisa de uma resposta, senão o cliente ficaria esperando na conexão.
+            send_frame(conn, encode({"error": f"Ação desconhecida: {action}"}))
 
     # Lida com a tentativa de login de um usuário.
     def handle_login(self, conn, request):
         username = request.get("username")
         password = request.get("password")
         # Verifica se o usuário e senha correspondem ao que está em 'config.py'.
-        if USERS.get(username) == password:
-            # Se forem válidos, gera um token simples usando SHA256 (hash).
-            token = hashlib.sha256(f"{username}{SECRET_KEY}".encode()).hexdigest()
+        # A senha recebida é convertida em hash e comparada com o hash guardado. 'compare_digest' leva
+        # sempre o mesmo tempo, não importa em que posição os valores diferem, o que impede
+        # descobrir a senha medindo o tempo de resposta. O hash e a comparação são feitos mesmo quando
+        # o usuário não existe (contra um hash fixo), senão a resposta rápida revelaria os usuários válidos.
+        stored_hash = USERS_HASHED.get(username)
+        matches = hmac.compare_digest(
+            stored_hash if stored_hash is not None else _DUMMY_PASSWORD_HASH,
+            hash_password(password if isinstance(password, str) else ""),
+        )
+        if stored_hash is not None and isinstance(password, str) and matches:
+            # Se forem válidos, usa o token (já calculado) do usuário.
+            token = self._user_to_token[username]
             # Envia o token de volta para o cliente.
-            conn.sendall(json.dumps({"token": token}).encode())
+            send_frame(conn, encode({"token": token}))
             logging.info(f"Usuário '{username}' autenticado com sucesso.")
         else:
             # Se as credenciais estiverem erradas, envia uma mensagem de erro.
-            conn.sendall(json.dumps({"error": "Credenciais inválidas"}).encode())
+            conn.sendall(_ERR_BAD_CREDS)
             logging.warning(f"Falha de autenticação para o usuário '{username}'.")
     
-    # Verifica se um token recebido é válido.
+    # Gera o token de um usuário: um HMAC-SHA256 do nome do usuário, usando a chave secreta.
+    # O HMAC é a forma correta de combinar uma chave com uma mensagem em um hash; simplesmente
+    # concatenar a chave ao texto antes de calcular o SHA256 é uma construção fraca.
+    @staticmethod
+    def generate_token(user):
+        return hmac.new(_SECRET_BYTES, user.encode(), hashlib.sha256).hexdigest()
+
+    # Verifica se um token recebido é válido (se pertence a algum usuário conhecido).
     def verify_token(self, token):
-        # Para cada usuário conhecido, gera o token esperado e compara com o recebido.
-        for user in USERS.keys():
-            expected_token = hashlib.sha256(f"{user}{SECRET_KEY}".encode()).hexdigest()
-            if token == expected_token:
-                return True # Se encontrar um correspondente, o token é válido.
-        return False # Se percorrer todos e não encontrar, é inválido.
+        # A checagem do tipo evita erro ao consultar o dicionário com um valor não "hasheável" (ex: lista).
+        return isinstance(token, str) and token in self._token_to_user
     
     # Lida com o envio de uma nova tarefa.
     def handle_submit_task(self, conn, request):
         # Identifica o cliente pelo token.
         client_id = self.get_user_from_token(request["token"])
+        data = request.get("data", {})
+        # Recusa dados que o worker não conseguiria executar (ex: uma duração que não é um número).
+        # Aceitos, eles só falhariam depois de a tarefa ter sido distribuída.
+        error = validate_task_data(data)
+        if error is not None:
+            send_frame(conn, encode({"error": f"Tarefa inválida: {error}"}))
+            return
         # Cria uma nova instância da classe Task.
         task = Task(
             id=str(uuid.uuid4()), # Gera um ID único universal.
             client_id=client_id,
-            data=request.get("data", {}), # Pega os dados da tarefa da requisição.
+            data=data, # Os dados da tarefa enviados na requisição.
             lamport_ts=self.lamport_clock.increment() # Atribui um timestamp de Lamport.
         )
         # Adiciona a nova tarefa ao gerenciador de estado.
         self.state_manager.add_task(task)
-        # Responde ao cliente confirmando o recebimento e enviando o ID da tarefa.
-        conn.sendall(json.dumps({"status": "Tarefa recebida", "task_id": task.id}).encode())
+        # Responde ao cliente confirmando o recebimento e enviando o ID da tarefa (ver _SUBMIT_ACK_PREFIX).
+        send_frame(conn, _SUBMIT_ACK_PREFIX + task.id.encode() + _SUBMIT_ACK_SUFFIX)
 
     # Descobre a qual usuário um token pertence.
     def get_user_from_token(self, token):
-        for user in USERS.keys():
-            # Gera o token esperado para cada usuário e compara.
-            expected_token = hashlib.sha256(f"{user}{SECRET_KEY}".encode()).hexdigest()
-            if token == expected_token:
-                return user
-        return "unknown"
+        return self._token_to_user.get(token, "unknown")
 
     # Lida com a consulta de status de uma tarefa.
     def handle_task_status(self, conn, request):
@@ -166,33 +287,83 @@ class Orchestrator:
         # Pede ao gerenciador de estado os detalhes da tarefa.
         status = self.state_manager.get_task_status(task_id)
         if status:
-            # Se a tarefa for encontrada, envia os detalhes de volta.
-            conn.sendall(json.dumps(status).encode())
+            # Se a tarefa for encontrada, monta o dicionário de resposta (já fora do Lock) e o envia de volta.
+            send_frame(conn, encode(dict(zip(TASK_STATUS_FIELDS, status))))
         else:
             # Se não, envia um erro.
-            conn.sendall(json.dumps({"error": "Tarefa não encontrada"}).encode())
+            conn.sendall(_ERR_NO_TASK)
 
     # Thread que ouve por mensagens dos workers (UDP).
+    # Ela apenas recebe os datagramas e os coloca na fila: a interpretação fica com 'handle_worker_messages'.
+    # Assim o socket é esvaziado rapidamente e o buffer do kernel não enche (descartando heartbeats)
+    # enquanto uma mensagem anterior ainda está sendo processada.
     def listen_for_workers(self):
         # Cria um socket UDP, que é mais leve que TCP e ideal para mensagens curtas como heartbeats.
         with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            # Aumenta o buffer de recepção do kernel (4 MB) para absorver rajadas de mensagens.
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
             s.bind((ORCHESTRATOR_HOST, WORKER_PORT))
             logging.info(f"Ouvindo workers em {ORCHESTRATOR_HOST}:{WORKER_PORT} (UDP)")
+            # Variáveis locais evitam a busca dos atributos a cada mensagem.
+            recvfrom = s.recvfrom
+            put = self._udp_q.put
             while True:
-                # Espera por uma mensagem UDP.
-                data, addr = s.recvfrom(1024)
-                message = json.loads(data.decode('utf-8'))
-                msg_type = message.get("type")
-                
-                # Se a mensagem for um heartbeat, atualiza o status do worker.
-                if msg_type == "heartbeat":
-                    worker_id = message["worker_id"]
-                    self.state_manager.update_worker_heartbeat(worker_id, addr)
-                # Se for uma notificação de conclusão, atualiza o status da tarefa.
-                elif msg_type == "task_complete":
-                    self.state_manager.update_task_status(
-                        message["task_id"], "COMPLETED", message["result"]
-                    )
+                # Espera por uma mensagem UDP e a repassa, junto com o endereço de origem.
+                # O tamanho máximo de um datagrama UDP: um grupo de conclusões pode passar de alguns KB.
+                put(recvfrom(65535))
+
+    # Thread que interpreta as mensagens dos workers colocadas na fila por 'listen_for_workers'.
+    def handle_worker_messages(self):
+        get = self._udp_q.get
+        # Tabela com a função que trata cada tipo de mensagem, montada uma única vez.
+        # Encontrar o tratamento é uma única busca no dicionário, em vez de uma comparação por tipo.
+        handlers = {
+            "heartbeat": self._on_heartbeat,
+            "task_complete": self._on_task_complete,
+            "task_complete_batch": self._on_task_complete_batch,
+        }
+        while True:
+            data, addr = get()
+            try:
+                # Converte os bytes recebidos direto para um dicionário (sem passar por uma string).
+                message = decode(data)
+                handler = handlers.get(message.get("type"))
+                # Tipos desconhecidos são ignorados.
+                if handler is not None:
+                    handler(message, addr)
+            # Uma mensagem malformada é descartada sem derrubar a thread.
+            except (DecodeError, KeyError, AttributeError, TypeError) as e:
+                logging.error(f"Mensagem inválida recebida do worker {addr}: {e}")
+
+    # Registra um sinal de vida do worker.
+    # Um worker novo já entra na distribuição de tarefas, sem esperar a próxima verificação periódica.
+    def _mark_alive(self, worker_id, addr):
+        if self.state_manager.update_worker_heartbeat(worker_id, addr):
+            self.load_balancer.add_worker(worker_id)
+
+    # Heartbeat: atualiza o status do worker.
+    def _on_heartbeat(self, message, addr):
+        self._mark_alive(message["worker_id"], addr)
+
+    # Notificação de conclusão: atualiza o status da tarefa.
+    # Uma tarefa que falhou no worker chega com o status "FAILED"; qualquer outro valor (ou a ausência
+    # do campo, em workers antigos) é tratado como conclusão normal.
+    def _on_task_complete(self, message, addr):
+        status = "FAILED" if message.get("status") == "FAILED" else "COMPLETED"
+        self.state_manager.update_task_status(message["task_id"], status, message["result"])
+        # A notificação também prova que o worker está vivo: um worker ocupado deixa de enviar
+        # heartbeats enquanto estiver notificando conclusões. Workers antigos não enviam o ID.
+        worker_id = message.get("worker_id")
+        if worker_id is not None:
+            self._mark_alive(worker_id, addr)
+
+    # Várias conclusões agrupadas pelo worker em uma única mensagem.
+    def _on_task_complete_batch(self, message, addr):
+        for item in message["tasks"]:
+            status = "FAILED" if item.get("status") == "FAILED" else "COMPLETED"
+            self.state_manager.update_task_status(item["task_id"], status, item["result"])
+        # Assim como a conclusão individual, vale como heartbeat.
+        self._mark_alive(message["worker_id"], addr)
 
     # Thread que monitora a saúde dos workers.
     def monitor_workers(self):
@@ -204,43 +375,98 @@ class Orchestrator:
             active_workers = self.state_manager.check_dead_workers()
             # Atualiza o balanceador de carga com a nova lista de workers ativos.
             self.load_balancer.update_workers(active_workers)
+            # Fecha as conexões com os workers que foram removidos.
+            active = set(active_workers)
+            # A lista é montada com o lock: a thread de distribuição pode inserir conexões no dicionário
+            # ao mesmo tempo, e percorrê-lo durante uma inserção gera um erro. O fechamento é feito fora do lock.
+            with self._worker_conns_lock:
+                stale = [w for w in self._worker_conns if w not in active]
+            for worker_id in stale:
+                self._close_worker_conn(worker_id)
+
+    # Retorna a conexão aberta com o worker, abrindo uma nova apenas se ainda não existir
+    # ou se a anterior já tiver sido fechada.
+    def _get_or_open(self, worker_id, task_addr):
+        with self._worker_conns_lock:
+            conn = self._worker_conns.get(worker_id)
+        if conn is not None and conn.fileno() != -1:
+            return conn
+        # A conexão é aberta fora do lock: um worker inalcançável atrasaria também o 'monitor_workers',
+        # que usa o mesmo lock. O timeout vale para a conexão e, depois, para cada envio pelo socket.
+        conn = socket.create_connection(task_addr, timeout=WORKER_SEND_TIMEOUT)
+        # Desativa o algoritmo de Nagle: cada tarefa é uma mensagem pequena que deve sair imediatamente,
+        # e não ficar retida (até ~40 ms) esperando a confirmação do envio anterior.
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # O lock é usado apenas para guardar a nova conexão. Se outra já tiver sido guardada
+        # nesse meio tempo, ela é mantida e a recém-aberta é descartada.
+        with self._worker_conns_lock:
+            current = self._worker_conns.get(worker_id)
+            if current is not None and current.fileno() != -1:
+                conn.close()
+                return current
+            self._worker_conns[worker_id] = conn
+        return conn
+
+    # Fecha e descarta a conexão com o worker (ex: após um erro de envio ou quando ele é removido).
+    def _close_worker_conn(self, worker_id):
+        with self._worker_conns_lock:
+            conn = self._worker_conns.pop(worker_id, None)
+        if conn is not None:
+            conn.close()
 
     # Thread que distribui tarefas da fila para os workers.
     def distribute_tasks(self):
         while True:
-            # Pega a próxima tarefa da fila do gerenciador de estado.
-            task = self.state_manager.get_next_task()
-            if not task:
-                time.sleep(1) # Se a fila estiver vazia, espera um pouco.
+            # Pega as próximas tarefas da fila do gerenciador de estado (até DISPATCH_BATCH de uma vez).
+            # Se a fila estiver vazia, a thread dorme até uma tarefa ser adicionada (sem consultar
+            # a fila repetidamente). O timeout apenas evita uma espera indefinida.
+            tasks = self.state_manager.wait_for_tasks(DISPATCH_BATCH, timeout=30)
+            if not tasks:
                 continue
-            
-            # Pede ao balanceador de carga para escolher o próximo worker.
-            worker_id = self.load_balancer.get_next_worker()
-            if not worker_id:
-                # Se não há workers disponíveis, devolve a tarefa para o início da fila.
-                logging.warning("Nenhum worker disponível. Devolvendo tarefa à fila.")
-                self.state_manager.add_task(task)
-                time.sleep(2)
+
+            # Pede ao balanceador de carga os workers de todo o lote com uma única chamada.
+            workers = self.load_balancer.get_next_workers(len(tasks))
+            if not workers:
+                # Se não há workers disponíveis, devolve as tarefas à fila.
+                logging.warning(f"Nenhum worker disponível. Devolvendo {len(tasks)} tarefa(s) à fila.")
+                for task in tasks:
+                    self.state_manager.add_task(task)
+                # Espera até algum worker se registrar, em vez de dormir por um tempo fixo.
+                self.load_balancer.wait_for_workers(timeout=30)
                 continue
 
-            try:
-                # Envia a tarefa para o worker escolhido via TCP.
-                worker_addr_info = self.state_manager.workers[worker_id]['addr']
-                # O worker_id contém o host e a porta de escuta da tarefa.
-                task_addr = (worker_addr_info[0], int(worker_id.split('_')[-1]))
-                
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.connect(task_addr)
+            # Workers que falharam neste lote: as tarefas seguintes destinadas a eles voltam direto à fila,
+            # sem uma nova tentativa de conexão.
+            failed = set()
+            for task, worker_id in zip(tasks, workers):
+                if worker_id in failed:
+                    self.state_manager.add_task(task)
+                    continue
+                try:
+                    # Envia a tarefa para o worker escolhido via TCP, no endereço calculado quando ele se registrou.
+                    task_addr = self.state_manager.workers[worker_id]['task_addr']
+
+                    # A conexão com o worker é mantida aberta entre uma tarefa e outra.
+                    s = self._get_or_open(worker_id, task_addr)
                     # Marca no objeto da tarefa qual worker foi designado.
-                    task.assigned_worker = worker_id
-                    s.sendall(json.dumps(task.__dict__).encode('utf-8'))
-                logging.info(f"Tarefa {task.id} enviada para {worker_id} em {task_addr}")
+                    self.state_manager.assign_task(task, worker_id)
+                    # Envia a tarefa com o cabeçalho de tamanho, para que o worker saiba onde ela termina.
+                    send_frame(s, encode(task.to_dict()))
+                    logging.info(f"Tarefa {task.id} enviada para {worker_id} em {task_addr}")
 
-            # Se a conexão com o worker falhar, a tarefa é devolvida à fila.
-            except (KeyError, ConnectionRefusedError) as e:
-                logging.error(f"Falha ao enviar tarefa {task.id} para {worker_id}: {e}. Reenfileirando.")
-                task.assigned_worker = None
-                self.state_manager.add_task(task)
+                # Se o worker não for encontrado ou a conexão com ele falhar, a tarefa é devolvida à fila.
+                # 'OSError' cobre conexão recusada, conexão encerrada pelo worker, pipe quebrado e tempo esgotado (WORKER_SEND_TIMEOUT).
+                # Uma tarefa enviada para um worker que caiu logo depois é recuperada por 'check_dead_workers'.
+                except (KeyError, OSError) as e:
+                    logging.error(f"Falha ao enviar tarefa {task.id} para {worker_id}: {e}. Reenfileirando.")
+                    failed.add(worker_id)
+                    # A conexão com problema é descartada; o próximo envio abre uma nova.
+                    self._close_worker_conn(worker_id)
+                    # O worker sai do rodízio para que as próximas tarefas não sejam enviadas a ele de novo.
+                    # Se ele continuar vivo, volta na próxima verificação periódica de 'monitor_workers'.
+                    self.load_balancer.remove_worker(worker_id)
+                    self.state_manager.assign_task(task, None)
+                    self.state_manager.add_task(task)
 
     # Função utilitária para criar um socket UDP configurado para Multicast.
     def create_multicast_socket(self):
@@ -252,63 +478,132 @@ class Orchestrator:
     # Thread do PRIMÁRIO que envia seu estado para o backup via Multicast.
     def sync_state_to_backup(self):
         multicast_sock = self.create_multicast_socket()
+        # O endereço de destino é o mesmo em todas as iterações.
+        group = (MULTICAST_GROUP, MULTICAST_PORT)
+        cycle = 0
         while self.role == "PRIMARY":
-            # Pega um "snapshot" (uma cópia instantânea) do estado atual.
-            state_snapshot = self.state_manager.get_state_snapshot()
-            
             # Envia duas mensagens distintas para o grupo multicast:
-            
-            # Mensagem Tipo 1: O snapshot completo do estado.
-            # Um byte `\x01` é adicionado no início para identificar o tipo da mensagem.
-            message = b'\x01' + state_snapshot
-            multicast_sock.sendto(message, (MULTICAST_GROUP, MULTICAST_PORT))
+
+            # Mensagem Tipo 1 ou 3: o estado.
+            # Na maior parte dos ciclos vai apenas o que mudou desde o ciclo anterior (delta, `\x03`).
+            # A cada SYNC_FULL_EVERY ciclos vai o snapshot completo (`\x01`), que também serve para
+            # um backup recém-iniciado, ou que perdeu algum delta, voltar a ficar sincronizado.
+            if cycle % SYNC_FULL_EVERY == 0:
+                msg_type, state_data = b'\x01', self.state_manager.get_state_snapshot()
+            else:
+                msg_type, state_data = b'\x03', self.state_manager.get_state_delta()
+                # Um delta grande demais para um datagrama (ex: muitas tarefas novas no mesmo ciclo) é
+                # trocado pelo snapshot, que pode ser dividido. A sequência continua válida: o snapshot
+                # leva o número deste delta, e o próximo delta segue a partir dele.
+                if len(state_data) >= SYNC_MAX_DATAGRAM:
+                    msg_type, state_data = b'\x01', self.state_manager.get_state_snapshot()
+            cycle += 1
+            # Uma falha no envio do estado não pode impedir o heartbeat logo abaixo: sem ele, o backup
+            # assumiria com o primário ainda vivo. O estado perdido é recuperado no próximo snapshot.
+            try:
+                self._send_state(multicast_sock, group, msg_type, state_data, cycle)
+            except OSError as e:
+                logging.error(f"Erro ao enviar o estado ao backup ({len(state_data)} bytes): {e}")
             
             # Mensagem Tipo 2: Um heartbeat "estou vivo" do primário.
-            # Um byte `\x02` identifica esta mensagem.
-            heartbeat_msg = b'\x02' + json.dumps({"ts": time.time()}).encode()
-            multicast_sock.sendto(heartbeat_msg, (MULTICAST_GROUP, MULTICAST_PORT))
+            # Um byte `\x02` identifica esta mensagem, seguido do timestamp em binário (9 bytes no total).
+            multicast_sock.sendto(b'\x02' + _HEARTBEAT_TS.pack(time.time()), group)
 
             time.sleep(SYNC_INTERVAL)
 
+    # Envia o estado ao grupo multicast. O byte de tipo no início identifica a mensagem.
+    def _send_state(self, sock, group, msg_type, state_data, transfer_id):
+        if len(state_data) < SYNC_MAX_DATAGRAM:
+            # 'sendmsg' envia as duas partes em um único datagrama, sem copiar o estado inteiro
+            # para concatená-lo ao byte de tipo.
+            sock.sendmsg([msg_type, state_data], [], 0, group)
+            return
+        # O estado não cabe em um datagrama: vai dividido em partes (mensagem tipo 4), que o backup
+        # junta antes de carregar. Apenas o snapshot chega aqui (um delta grande vira snapshot).
+        view = memoryview(state_data)
+        size = SYNC_MAX_DATAGRAM - 1 - _STATE_CHUNK.size
+        count = -(-len(view) // size)
+        transfer_id &= 0xFFFFFFFF
+        for i in range(count):
+            header = _STATE_CHUNK.pack(transfer_id, i, count)
+            sock.sendmsg([b'\x04', header, view[i * size:(i + 1) * size]], [], 0, group)
+
     # Thread do BACKUP que ouve as mensagens de sincronização do primário.
+    # As mensagens são recebidas por um laço de eventos do asyncio; a verificação de falha do primário
+    # é agendada no mesmo laço, então não há um 'recvfrom' bloqueado com timeout.
     def listen_for_sync(self):
+        asyncio.run(self._listen_for_sync())
+        # O laço só termina quando o primário é considerado morto.
+        self.promote_to_primary() # Inicia o processo de failover.
+
+    async def _listen_for_sync(self):
         # Cria e configura um socket para receber pacotes multicast.
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Aumenta o buffer de recepção do kernel (4 MB): um snapshot grande chega como uma rajada de datagramas.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
         sock.bind(('', MULTICAST_PORT))
         
         # Diz ao sistema operacional para se juntar ao grupo multicast.
         mreq = struct.pack("4sl", socket.inet_aton(MULTICAST_GROUP), socket.INADDR_ANY)
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
-        
+
+        loop = asyncio.get_running_loop()
+        # Cada datagrama recebido é entregue a 'handle_sync_message'.
+        transport, _ = await loop.create_datagram_endpoint(lambda: _SyncProtocol(self), sock=sock)
         logging.info("Backup ouvindo por sincronização de estado e heartbeats do primário.")
-        
-        while self.role == "BACKUP":
-            # Verifica se o primário está "morto" (não envia heartbeat há muito tempo).
-            if time.time() - self.last_primary_heartbeat > PRIMARY_TIMEOUT:
+
+        # Concluído quando o primário for considerado morto.
+        primary_dead = loop.create_future()
+
+        # Verifica se o primário está "morto" (não envia heartbeat há muito tempo).
+        # Se ainda não estiver, agenda a próxima verificação para o momento em que o prazo venceria.
+        def check_primary():
+            silence = time.time() - self.last_primary_heartbeat
+            if silence > PRIMARY_TIMEOUT:
                 logging.warning("Heartbeat do primário não detectado. Iniciando failover!")
-                self.promote_to_primary() # Inicia o processo de failover.
-                break # Sai do loop de escuta do backup.
+                primary_dead.set_result(None)
+            else:
+                loop.call_later(PRIMARY_TIMEOUT - silence + 0.01, check_primary)
 
-            # Define um timeout no socket para não ficar bloqueado para sempre.
-            sock.settimeout(PRIMARY_TIMEOUT)
-            try:
-                # Espera por uma mensagem multicast.
-                data, _ = sock.recvfrom(65535)
-                # Extrai o primeiro byte para saber o tipo da mensagem.
-                msg_type = data[0:1]
-                content = data[1:]
-
-                if msg_type == b'\x01': # Se for um snapshot do estado...
-                    self.state_manager.load_state_snapshot(content, self.lamport_clock)
-                elif msg_type == b'\x02': # Se for um heartbeat do primário...
-                    self.last_primary_heartbeat = time.time() # Atualiza o timestamp.
-
-            except socket.timeout:
-                # Se o timeout ocorrer, o loop continua e a verificação no início do 'while'
-                # vai eventualmente detectar a falha do primário.
-                logging.warning("Socket timeout esperando por pacotes do primário.")
-                continue
+        loop.call_later(PRIMARY_TIMEOUT, check_primary)
+        try:
+            await primary_dead
+        finally:
+            transport.close()
+
+    # Trata uma mensagem de sincronização recebida do primário (usado pelo backup).
+    def handle_sync_message(self, data):
+        # Extrai o primeiro byte para saber o tipo da mensagem.
+        msg_type = data[0:1]
+        content = data[1:]
+
+        if msg_type == b'\x01': # Se for um snapshot do estado...
+            self.state_manager.load_state_snapshot(content, self.lamport_clock)
+        elif msg_type == b'\x03': # Se for um delta do estado...
+            self.state_manager.load_state_delta(content, self.lamport_clock)
+        elif msg_type == b'\x02': # Se for um heartbeat do primário...
+            self.last_primary_heartbeat = time.time() # Atualiza o timestamp.
+        elif msg_type == b'\x04': # Se for uma parte de um snapshot dividido...
+            self._on_snapshot_part(content)
+
+    # Guarda uma parte de um snapshot dividido em vários datagramas e, quando todas chegarem,
+    # carrega o snapshot completo. Se alguma parte se perder, a transferência é abandonada quando
+    # a do próximo snapshot começar.
+    def _on_snapshot_part(self, content):
+        try:
+            transfer_id, index, count = _STATE_CHUNK.unpack_from(content)
+            if self._snapshot_parts is None or self._snapshot_parts[0] != transfer_id:
+                self._snapshot_parts = (transfer_id, [None] * count)
+            parts = self._snapshot_parts[1]
+            parts[index] = content[_STATE_CHUNK.size:]
+        except (struct.error, IndexError) as e:
+            logging.error(f"Parte de snapshot inválida recebida: {e}")
+            return
+        if None in parts:
+            return
+        self._snapshot_parts = None
+        self.state_manager.load_state_snapshot(b"".join(parts), self.lamport_clock)
 
     # Função que transforma o backup em primário.
     def promote_to_primary(self):
@@ -319,6 +614,8 @@ class Orchestrator:
 
 # Ponto de entrada do script.
 if __name__ == "__main__":
+    # Configura o formato e o nível dos logs.
+    configure_logging()
     # Verifica se o argumento '--backup' foi passado na linha de comando.
     is_backup = "--backup" in sys.argv
     # Cria a instância do Orquestrador com o papel correto.
@@ -3,10 +3,15 @@
 # --- Importações ---
 import threading  # Necessário para o Lock, que garante a segurança em ambiente com múltiplas threads.
 import time  # Usado para obter o timestamp atual para os heartbeats.
-import json  # Usado para serializar/desserializar o estado do sistema para a sincronização com o backup.
-from typing import Dict, List  # Para anotações de tipo, que melhoram a clareza do código.
+from collections import deque, defaultdict, OrderedDict  # Fila com inserção e remoção em O(1) nas duas pontas; dicionários com valor padrão e com ordem ajustável.
+from typing import Deque, Dict, List  # Para anotações de tipo, que melhoram a clareza do código.
 from shared.models import Task  # Importa a classe Task para anotação de tipo.
-from config import WORKER_TIMEOUT, logging  # Importa configurações e o logger.
+from shared.communication import encode, decode, DecodeError, pack_frame, unpack_frames  # Serializa o estado para a sincronização com o backup.
+import logging  # Para registrar os eventos do estado (novas tarefas, workers, falhas).
+from config import WORKER_TIMEOUT, COMPLETED_TASK_TTL, MAX_COMPLETED_TASKS  # Importa configurações.
+
+# Nomes dos campos retornados por 'StateManager.get_task_status', na mesma ordem da tupla.
+TASK_STATUS_FIELDS = ("id", "client_id", "status", "data", "lamport_ts", "assigned_worker", "result")
 
 # Esta classe centraliza e protege todo o estado compartilhado do orquestrador.
 # Qualquer parte do orquestrador que precise ler ou modificar a lista de tarefas ou workers
@@ -16,54 +21,162 @@ class StateManager:
     def __init__(self):
         # Dicionário que armazena todos os objetos de tarefa, usando o ID da tarefa como chave.
         self.tasks: Dict[str, Task] = {}
-        # Lista que atua como uma fila (FIFO) para os IDs das tarefas pendentes.
-        self.pending_tasks: List[str] = []
+        # Fila (FIFO) com os IDs das tarefas pendentes. Um 'deque' remove do início e insere em qualquer
+        # ponta em tempo constante; em uma lista, 'pop(0)' e 'insert(0, ...)' deslocam todos os elementos.
+        self.pending_tasks: Deque[str] = deque()
+        # Índice reverso: para cada worker, os IDs das tarefas em andamento atribuídas a ele.
+        # Quando um worker falha, suas tarefas são encontradas direto aqui, sem percorrer todas as tarefas.
+        self.assigned: Dict[str, set] = defaultdict(set)
+        # IDs das tarefas finalizadas (COMPLETED ou FAILED) e o momento em que foram finalizadas,
+        # da mais antiga para a mais recente. Usado para descartar as tarefas antigas (ver '_evict_old'),
+        # para que 'tasks' e os snapshots enviados ao backup não cresçam indefinidamente.
+        self._completed: OrderedDict[str, float] = OrderedDict()
         # Dicionário que armazena o estado de cada worker ativo.
-        self.workers: Dict[str, Dict] = {}  # Formato: { 'worker_id': {'addr': ('host', port), 'last_heartbeat': ts} }
-        # O Lock (cadeado) é a peça central para garantir que apenas uma thread
-        # modifique o estado de cada vez, evitando condições de corrida.
-        self.lock = threading.Lock()
+        self.workers: Dict[str, Dict] = {}  # Formato: { 'worker_id': {'addr': ('host', port), 'task_addr': ('host', port), 'last_heartbeat': ts} }
+        # --- Sincronização incremental com o backup ---
+        # IDs das tarefas criadas ou alteradas desde a última sincronização enviada ao backup.
+        self._dirty_tasks: set = set()
+        # IDs das tarefas removidas do estado desde a última sincronização.
+        self._removed_tasks: set = set()
+        # Cada tarefa já serializada (com o cabeçalho de tamanho) para o snapshot, guardada até a tarefa mudar.
+        # Assim o snapshot só serializa de novo as tarefas alteradas desde o snapshot anterior.
+        self._wire_cache: Dict[str, bytes] = {}
+        # Indica se a fila de pendentes mudou desde a última sincronização.
+        self._pending_dirty = False
+        # Número de sequência da última atualização incremental (delta) gerada pelo primário ou aplicada
+        # pelo backup. None significa que ainda não há uma base: nenhum snapshot completo foi enviado
+        # (no primário) ou aplicado (no backup, que então ignora os deltas até receber um).
+        self._seq: int | None = None
+        # Os Locks (cadeados) garantem que apenas uma thread modifique cada parte do estado de cada vez,
+        # evitando condições de corrida. Há um Lock para cada parte, e não um único para tudo, para que
+        # um heartbeat de worker não espere, por exemplo, uma consulta de status de tarefa.
+        # - '_workers_lock' protege 'workers';
+        # - '_queue_lock' protege 'pending_tasks' e '_pending_dirty';
+        # - '_tasks_lock' protege 'tasks', 'assigned', '_completed', '_wire_cache', '_dirty_tasks' e '_removed_tasks'.
+        # Quando um método precisa de mais de um, eles são SEMPRE adquiridos nesta ordem
+        # (workers -> queue -> tasks). Uma ordem fixa impede que duas threads fiquem esperando uma pela outra (deadlock).
+        # '_seq' só é usado com os três adquiridos.
+        self._workers_lock = threading.Lock()
+        self._queue_lock = threading.Lock()
+        self._tasks_lock = threading.Lock()
+        # Condição associada ao Lock da fila: quem espera por uma tarefa dorme aqui e é acordado
+        # assim que uma tarefa entra na fila, sem precisar consultar a fila repetidamente.
+        self._queue_cv = threading.Condition(self._queue_lock)
 
     # Adiciona uma nova tarefa ao estado.
     def add_task(self, task: Task):
-        # 'with self.lock:' garante que as operações dentro deste bloco sejam atômicas.
-        with self.lock:
+        # O bloco 'with' garante que as operações dentro dele sejam atômicas.
+        with self._queue_lock, self._tasks_lock:
             # Adiciona a tarefa ao dicionário principal.
             self.tasks[task.id] = task
             # Adiciona o ID da tarefa ao final da fila de pendentes.
             self.pending_tasks.append(task.id)
+            self._touch(task.id)
+            self._pending_dirty = True
+            # Acorda a thread que estiver esperando por uma tarefa.
+            self._queue_cv.notify()
             logging.info(f"Nova tarefa adicionada à fila: {task.id}")
 
     # Pega a próxima tarefa da fila para ser processada.
     def get_next_task(self) -> Task | None:
-        with self.lock:
+        with self._queue_lock:
             # Se a fila de tarefas pendentes estiver vazia, não há nada a fazer.
             if not self.pending_tasks:
                 return None
+            return self._pop_next_task()
+
+    # Igual a 'get_next_task', mas, se a fila estiver vazia, espera até uma tarefa chegar
+    # (ou até 'timeout' segundos, retornando None).
+    def wait_for_task(self, timeout=None) -> Task | None:
+        with self._queue_cv:
+            # 'wait_for' libera o Lock enquanto espera e o readquire ao acordar.
+            if not self._queue_cv.wait_for(lambda: self.pending_tasks, timeout):
+                return None
+            return self._pop_next_task()
+
+    # Versão em lote de 'wait_for_task': espera até haver alguma tarefa e retira da fila até 'n' de uma vez,
+    # com uma única aquisição do Lock. Retorna uma lista vazia se nenhuma tarefa chegar em 'timeout' segundos.
+    def wait_for_tasks(self, n: int, timeout=None) -> List[Task]:
+        with self._queue_cv:
+            if not self._queue_cv.wait_for(lambda: self.pending_tasks, timeout):
+                return []
+            tasks = []
+            while self.pending_tasks and len(tasks) < n:
+                task = self._pop_next_task()
+                if task:
+                    tasks.append(task)
+            return tasks
+
+    # Remove a primeira tarefa da fila e a marca como em andamento.
+    # Deve ser chamado com '_queue_lock' adquirido e a fila não vazia.
+    def _pop_next_task(self) -> Task | None:
+        with self._tasks_lock:
             # Remove o primeiro ID da fila (comportamento de fila FIFO).
-            task_id = self.pending_tasks.pop(0)
+            task_id = self.pending_tasks.popleft()
+            self._pending_dirty = True
             # Busca o objeto Task completo no dicionário principal.
             task = self.tasks.get(task_id)
             if task:
                 # Atualiza o status da tarefa para indicar que ela está sendo processada.
                 task.status = "IN_PROGRESS"
+                self._touch(task_id)
             return task
 
+    # Registra qual worker recebeu a tarefa.
+    # A alteração passa por aqui, e não direto no objeto, para que seja incluída na próxima sincronização.
+    def assign_task(self, task: Task, worker_id: str | None):
+        with self._tasks_lock:
+            self._unindex(task)
+            task.assigned_worker = worker_id
+            self._index(task)
+            self._touch(task.id)
+
+    # Registra que a tarefa mudou: ela vai no próximo delta e sua versão serializada deixa de valer.
+    # Deve ser chamado com '_tasks_lock' adquirido.
+    def _touch(self, task_id: str):
+        self._dirty_tasks.add(task_id)
+        self._wire_cache.pop(task_id, None)
+
+    # Coloca a tarefa no índice reverso, se ela estiver em andamento em algum worker.
+    # Deve ser chamado com '_tasks_lock' adquirido.
+    def _index(self, task: Task):
+        if task.assigned_worker is not None and task.status == "IN_PROGRESS":
+            self.assigned[task.assigned_worker].add(task.id)
+
+    # Retira a tarefa do índice reverso. Deve ser chamado com '_tasks_lock' adquirido.
+    def _unindex(self, task: Task):
+        # '.get' em vez de '[]' para não criar um conjunto vazio no 'defaultdict'.
+        ids = self.assigned.get(task.assigned_worker)
+        if ids:
+            ids.discard(task.id)
+            if not ids:
+                del self.assigned[task.assigned_worker]
+
     # Atualiza o timestamp do último heartbeat de um worker.
+    # Retorna True se for a primeira vez que este worker é visto.
     def update_worker_heartbeat(self, worker_id: str, worker_addr):
-        with self.lock:
+        with self._workers_lock:
+            worker = self.workers.get(worker_id)
+            # Worker já conhecido: só atualiza o registro existente.
+            if worker is not None:
+                worker['addr'] = worker_addr
+                worker['last_heartbeat'] = time.time() # Armazena o momento exato do último sinal de vida.
+                return False
             # Se for a primeira vez que vemos este worker, registra um log.
-            if worker_id not in self.workers:
-                logging.info(f"Novo worker registrado: {worker_id} em {worker_addr}")
-            # Adiciona ou atualiza as informações do worker.
+            logging.info(f"Novo worker registrado: {worker_id} em {worker_addr}")
+            # O worker_id tem o formato 'host_porta', onde a porta é a que o worker usa para receber tarefas.
+            # O endereço de envio de tarefas é calculado uma única vez aqui, e não a cada tarefa distribuída.
+            task_port = int(worker_id.rsplit('_', 1)[-1])
             self.workers[worker_id] = {
                 'addr': worker_addr,
-                'last_heartbeat': time.time() # Armazena o momento exato do último sinal de vida.
+                'task_addr': (worker_addr[0], task_port),
+                'last_heartbeat': time.time()
             }
+            return True
 
     # Verifica quais workers estão inativos (mortos) e lida com suas tarefas.
     def check_dead_workers(self):
-        with self.lock:
+        with self._workers_lock:
             now = time.time()
             # Cria uma lista de IDs de workers cujo último heartbeat foi há mais tempo que o TIMEOUT definido.
             dead_workers = [
@@ -71,68 +184,255 @@ class StateManager:
                 if now - data['last_heartbeat'] > WORKER_TIMEOUT
             ]
             
-            # Para cada worker inativo encontrado...
-            for worker_id in dead_workers:
-                logging.warning(f"Worker {worker_id} está inativo. Removendo e reatribuindo tarefas.")
-                # Remove o worker da lista de ativos.
-                del self.workers[worker_id]
-                
-                # Procura por todas as tarefas que estavam sendo executadas pelo worker que falhou.
-                for task_id, task in self.tasks.items():
-                    if task.assigned_worker == worker_id and task.status == "IN_PROGRESS":
-                        # Reseta o status da tarefa para "PENDENTE".
-                        task.status = "PENDING"
-                        task.assigned_worker = None
-                        # Coloca a tarefa de volta no início da fila para ser reatribuída rapidamente.
-                        self.pending_tasks.insert(0, task_id)
-                        logging.info(f"Tarefa {task_id} do worker {worker_id} devolvida à fila.")
+            # Na maioria das verificações todos estão vivos, e a fila e as tarefas nem são bloqueadas.
+            if dead_workers:
+                with self._queue_lock, self._tasks_lock:
+                    # Para cada worker inativo encontrado...
+                    for worker_id in dead_workers:
+                        logging.warning(f"Worker {worker_id} está inativo. Removendo e reatribuindo tarefas.")
+                        # Remove o worker da lista de ativos.
+                        del self.workers[worker_id]
+
+                        # Percorre apenas as tarefas que estavam sendo executadas pelo worker que falhou.
+                        for task_id in self.assigned.pop(worker_id, ()):
+                            task = self.tasks.get(task_id)
+                            if task is not None and task.status == "IN_PROGRESS":
+                                # Reseta o status da tarefa para "PENDENTE".
+                                task.status = "PENDING"
+                                task.assigned_worker = None
+                                # Coloca a tarefa de volta no início da fila para ser reatribuída rapidamente.
+                                self.pending_tasks.appendleft(task_id)
+                                self._touch(task_id)
+                                self._pending_dirty = True
+                                self._queue_cv.notify()
+                                logging.info(f"Tarefa {task_id} do worker {worker_id} devolvida à fila.")
+            # Aproveita a verificação periódica para descartar as tarefas finalizadas antigas.
+            with self._tasks_lock:
+                self._evict_old()
             # Retorna a lista atualizada de workers ativos.
             return list(self.workers.keys())
 
+    # Descarta as tarefas finalizadas há mais de COMPLETED_TASK_TTL segundos e, se ainda houver mais
+    # que MAX_COMPLETED_TASKS, as mais antigas além desse limite. Tarefas pendentes ou em andamento
+    # nunca são descartadas. Uma consulta de status de uma tarefa descartada recebe "Tarefa não encontrada".
+    # Deve ser chamado com '_tasks_lock' adquirido.
+    def _evict_old(self, max_completed=MAX_COMPLETED_TASKS, ttl=COMPLETED_TASK_TTL):
+        completed = self._completed
+        cutoff = time.time() - ttl
+        # As mais antigas estão no início: basta remover do início enquanto a condição valer.
+        while completed:
+            task_id, finished_at = next(iter(completed.items()))
+            if finished_at > cutoff and len(completed) <= max_completed:
+                break
+            del completed[task_id]
+            self.tasks.pop(task_id, None)
+            # A remoção também é enviada ao backup no próximo delta.
+            self._dirty_tasks.discard(task_id)
+            self._wire_cache.pop(task_id, None)
+            self._removed_tasks.add(task_id)
+
+    # Atualiza o registro de tarefas finalizadas conforme o novo status da tarefa.
+    # Deve ser chamado com '_tasks_lock' adquirido.
+    def _track_completion(self, task: Task, finished_at=None):
+        if task.status in ("COMPLETED", "FAILED"):
+            self._completed[task.id] = finished_at or time.time()
+            # Uma tarefa finalizada de novo (ex: notificação repetida) passa a ser a mais recente.
+            self._completed.move_to_end(task.id)
+        else:
+            self._completed.pop(task.id, None)
+
     # Atualiza o status de uma tarefa (ex: para COMPLETED).
     def update_task_status(self, task_id, status, result=None):
-        with self.lock:
-            if task_id in self.tasks:
-                self.tasks[task_id].status = status
-                self.tasks[task_id].result = result # Armazena o resultado da tarefa.
+        with self._tasks_lock:
+            task = self.tasks.get(task_id)
+            if task is not None:
+                # Uma tarefa concluída sai do índice reverso do seu worker.
+                self._unindex(task)
+                task.status = status
+                task.result = result # Armazena o resultado da tarefa.
+                self._index(task)
+                self._track_completion(task)
+                self._touch(task_id)
                 logging.info(f"Status da tarefa {task_id} atualizado para {status}")
 
     # Obtém o status de uma tarefa específica.
+    # Retorna os campos da tarefa em uma tupla, na ordem de TASK_STATUS_FIELDS, ou None se ela não existir.
+    # Com o Lock adquirido é feita apenas a cópia dos valores (uma tupla); quem chama monta a resposta
+    # depois, sem bloquear as outras threads. Como a cópia é feita de uma vez, a resposta não mistura
+    # campos de antes e depois de uma atualização.
     def get_task_status(self, task_id):
-        with self.lock:
-            task = self.tasks.get(task_id)
-            # Retorna os dados da tarefa como um dicionário se ela existir.
-            return task.__dict__ if task else None
+        with self._tasks_lock:
+            t = self.tasks.get(task_id)
+            if t is None:
+                return None
+            return (t.id, t.client_id, t.status, t.data, t.lamport_ts, t.assigned_worker, t.result)
 
     # Tira uma "foto" (snapshot) do estado atual do sistema para ser enviada ao backup.
+    # Como o snapshot contém tudo, as alterações pendentes de sincronização são descartadas:
+    # o próximo delta conterá apenas o que mudar a partir daqui.
+    # O snapshot é uma sequência de mensagens com cabeçalho de tamanho: primeiro os dados gerais
+    # (sequência, fila e workers) e depois uma mensagem para cada tarefa. Cada tarefa é serializada
+    # separadamente para que a versão serializada possa ser reaproveitada enquanto a tarefa não mudar.
     def get_state_snapshot(self):
-        with self.lock:
-            # Serializa as listas e dicionários para uma string JSON em formato de bytes (utf-8).
-            return json.dumps({
-                "tasks": {tid: t.__dict__ for tid, t in self.tasks.items()},
-                "pending_tasks": self.pending_tasks,
-                "workers": self.workers
-            }).encode('utf-8')
+        # Com os Locks adquiridos, apenas copia as estruturas (cópias rasas, rápidas).
+        # A serialização, que é a parte demorada, acontece depois, sem bloquear as outras threads.
+        # Uma tarefa alterada durante a serialização já foi marcada de novo e vai no próximo delta.
+        with self._workers_lock, self._queue_lock, self._tasks_lock:
+            # O primeiro snapshot enviado define o início da sequência.
+            if self._seq is None:
+                self._seq = 0
+            self._dirty_tasks.clear()
+            self._removed_tasks.clear()
+            self._pending_dirty = False
+            seq = self._seq
+            cache = self._wire_cache
+            # Para cada tarefa, a versão já serializada (ou None, se ainda precisar ser serializada).
+            entries = [(t, cache.get(t.id)) for t in self.tasks.values()]
+            # O deque é convertido em lista apenas aqui, na fronteira da serialização.
+            pending = list(self.pending_tasks)
+            workers = dict(self.workers)
 
-    # Carrega um snapshot de estado recebido do orquestrador primário (usado pelo backup).
-    def load_state_snapshot(self, snapshot_json, clock: 'LamportClock'):
-        with self.lock:
+        # Serializa apenas as tarefas que mudaram desde o último snapshot.
+        fresh = {}
+        frames = []
+        for task, frame in entries:
+            if frame is None:
+                frame = fresh[task.id] = pack_frame(encode(task.to_dict()))
+            frames.append(frame)
+        if fresh:
+            with self._tasks_lock:
+                for task_id, frame in fresh.items():
+                    # Só guarda se a tarefa não mudou (nem foi descartada) enquanto era serializada.
+                    if task_id not in self._dirty_tasks and task_id in self.tasks:
+                        cache[task_id] = frame
+
+        # Serializa os dados gerais direto para bytes, no formato configurado (WIRE_FORMAT).
+        header = pack_frame(encode({
+            # O delta seguinte a este snapshot terá o número 'seq + 1'.
+            "seq": seq,
+            "pending_tasks": pending,
+            "workers": workers
+        }))
+        return header + b"".join(frames)
+
+    # Gera uma atualização incremental (delta) com apenas o que mudou desde a última sincronização.
+    # Na maioria dos ciclos poucas tarefas mudam, então o delta é bem menor que o snapshot completo
+    # e cabe com mais facilidade em um único datagrama.
+    def get_state_delta(self):
+        # Assim como no snapshot, só a cópia é feita com os Locks adquiridos; a serialização vem depois.
+        with self._workers_lock, self._queue_lock, self._tasks_lock:
+            self._seq += 1
+            tasks = [self.tasks[tid] for tid in self._dirty_tasks if tid in self.tasks]
+            delta = {
+                "seq": self._seq,
+                "removed": list(self._removed_tasks),
+                # Os workers são poucos e mudam a cada heartbeat, então vão sempre completos.
+                "workers": dict(self.workers)
+            }
+            # A fila de pendentes só é enviada quando mudou.
+            if self._pending_dirty:
+                delta["pending_tasks"] = list(self.pending_tasks)
+            self._dirty_tasks.clear()
+            self._removed_tasks.clear()
+            self._pending_dirty = False
+        delta["tasks"] = {t.id: t.to_dict() for t in tasks}
+        return encode(delta)
+
+    # Aplica um delta recebido do primário (usado pelo backup).
+    # Retorna False se o delta não puder ser aplicado porque algum anterior foi perdido; nesse caso
+    # o backup ignora os deltas seguintes até receber o próximo snapshot completo.
+    def load_state_delta(self, data: bytes, clock: 'LamportClock') -> bool:
+        # A desserialização acontece antes de adquirir os Locks.
+        try:
+            delta = decode(data)
+        except DecodeError as e:
+            logging.error(f"Erro ao aplicar o delta do estado: {e}")
+            return False
+        with self._workers_lock, self._queue_lock, self._tasks_lock:
             try:
-                # Desserializa a string JSON de volta para objetos Python.
-                state = json.loads(snapshot_json.decode('utf-8'))
-                self.tasks = {tid: Task(**t_data) for tid, t_data in state["tasks"].items()}
-                self.pending_tasks = state["pending_tasks"]
-                self.workers = state["workers"]
-
-                # Sincroniza o relógio de Lamport local com o estado recebido.
-                # O relógio deve ser ajustado para o maior timestamp visto no sistema.
-                max_ts = 0
-                for task in self.tasks.values():
+                # Aguardando um snapshot (início ou lacuna anterior): não há base para aplicar o delta.
+                if self._seq is None:
+                    return False
+                # Datagramas UDP podem se perder: se a sequência pulou, o estado local ficou desatualizado.
+                if delta["seq"] != self._seq + 1:
+                    logging.warning(f"Delta de estado {delta['seq']} recebido, esperado {self._seq + 1}. Aguardando snapshot completo.")
+                    self._seq = None
+                    return False
+
+                max_ts = clock.get_time()
+                for tid, t_data in delta["tasks"].items():
+                    task = Task(**t_data)
+                    # O índice reverso não é enviado pelo primário: é mantido aqui a partir das tarefas recebidas.
+                    old = self.tasks.get(tid)
+                    if old is not None:
+                        self._unindex(old)
+                    self.tasks[tid] = task
+                    self._wire_cache.pop(tid, None)
+                    self._index(task)
+                    self._track_completion(task)
                     if task.lamport_ts > max_ts:
                         max_ts = task.lamport_ts
+                for tid in delta["removed"]:
+                    old = self.tasks.pop(tid, None)
+                    if old is not None:
+                        self._unindex(old)
+                    self._completed.pop(tid, None)
+                    self._wire_cache.pop(tid, None)
+                if "pending_tasks" in delta:
+                    self.pending_tasks = deque(delta["pending_tasks"])
+                self.workers = delta["workers"]
+                self._seq = delta["seq"]
+                # Mantém o relógio de Lamport no maior timestamp visto no sistema.
                 clock.set_time(max_ts)
+                return True
+            # Trata erros caso o delta esteja corrompido ou em formato inesperado.
+            except (KeyError, TypeError, AttributeError) as e:
+                logging.error(f"Erro ao aplicar o delta do estado: {e}")
+                self._seq = None
+                return False
+
+    # Carrega um snapshot de estado recebido do orquestrador primário (usado pelo backup).
+    def load_state_snapshot(self, snapshot: bytes, clock: 'LamportClock'):
+        # A desserialização acontece antes de adquirir os Locks.
+        try:
+            frames = unpack_frames(snapshot)
+            # A primeira mensagem traz os dados gerais; cada uma das seguintes, uma tarefa.
+            state = decode(next(frames))
+            tasks = {}
+            for frame in frames:
+                t_data = decode(frame)
+                tasks[t_data["id"]] = Task(**t_data)
+            pending = deque(state["pending_tasks"])
+            workers = state["workers"]
+            seq = state["seq"]
+        # Trata erros caso o snapshot esteja corrompido ou em formato inesperado.
+        except (DecodeError, StopIteration, KeyError, TypeError) as e:
+            logging.error(f"Erro ao carregar o snapshot do estado: {e!r}")
+            return
+
+        with self._workers_lock, self._queue_lock, self._tasks_lock:
+            self.tasks = tasks
+            self._wire_cache = {}
+            # Reconstrói o índice reverso a partir das tarefas recebidas.
+            self.assigned = defaultdict(set)
+            # O momento exato em que cada tarefa foi finalizada não é enviado pelo primário; para o backup,
+            # o prazo de descarte das tarefas já finalizadas conta a partir do recebimento do snapshot.
+            self._completed = OrderedDict()
+            now = time.time()
+            for task in self.tasks.values():
+                self._index(task)
+                self._track_completion(task, now)
+            self.pending_tasks = pending
+            self.workers = workers
+            # Os próximos deltas continuam a partir da sequência deste snapshot.
+            self._seq = seq
+
+            # Sincroniza o relógio de Lamport local com o estado recebido.
+            # O relógio deve ser ajustado para o maior timestamp visto no sistema.
+            max_ts = 0
+            for task in self.tasks.values():
+                if task.lamport_ts > max_ts:
+                    max_ts = task.lamport_ts
+            clock.set_time(max_ts)
 
-                logging.info("Estado global sincronizado com sucesso a partir do backup.")
-            # Trata erros caso o snapshot esteja corrompido ou em formato inesperado.
-            except (json.JSONDecodeError, KeyError) as e:
-                logging.error(f"Erro ao carregar o snapshot do estado: {e}")
\ No newline at end of file
+            logging.info("Estado global sincronizado com sucesso a partir do backup.")
@@ -1 +1,159 @@
-# Futuro: implementar comunicação gRPC ou sockets reutilizáveis
+# shared/communication.py
+
+# --- Importações ---
+# json: serializador padrão do Python, usado como alternativa quando o orjson não está instalado.
+# struct: para empacotar o tamanho de cada mensagem em um cabeçalho binário de tamanho fixo.
+import json
+import struct
+
+# Formato usado para serializar as mensagens enviadas ("json" ou "msgpack").
+from config import WIRE_FORMAT, MAX_FRAME_SIZE
+
+# O 'orjson' é uma biblioteca opcional implementada em Rust (com instruções SIMD) que serializa
+# e desserializa JSON muito mais rápido que o módulo padrão. Além disso, 'orjson.dumps' já retorna
+# 'bytes', evitando a criação de uma string intermediária antes do envio pelo socket.
+# Se ela não estiver instalada, o sistema continua funcionando com o 'json' da biblioteca padrão.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# O 'msgpack' é um formato binário opcional: mais compacto e mais rápido de interpretar que o JSON.
+# Ele só é usado para enviar mensagens quando WIRE_FORMAT = "msgpack" e a biblioteca está instalada.
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Mensagens em MessagePack começam com este byte de versão. O valor 0xC1 nunca é usado pela
+# especificação do MessagePack e nunca aparece no início de um JSON válido, então o lado que recebe
+# consegue distinguir os dois formatos e continuar aceitando mensagens JSON de componentes antigos.
+_MSGPACK_TAG = 0xC1
+_MSGPACK_PREFIX = bytes([_MSGPACK_TAG])
+
+# Indica se as mensagens enviadas por este processo serão codificadas em MessagePack.
+# É público para que quem monta mensagens em JSON por conta própria (ex: o cliente) saiba quando não fazê-lo.
+USE_MSGPACK = WIRE_FORMAT == "msgpack" and msgpack is not None
+
+# Exceção lançada quando os dados recebidos não podem ser interpretados.
+# Os erros do 'json', do 'orjson' e do 'msgpack' são todos subclasses de ValueError.
+DecodeError = ValueError
+
+# Converte um objeto Python (ex: dicionário) em bytes prontos para serem enviados pela rede.
+def encode(obj) -> bytes:
+    if USE_MSGPACK:
+        return _MSGPACK_PREFIX + msgpack.packb(obj, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+# Converte os bytes recebidos da rede de volta para um objeto Python.
+# O formato (JSON ou MessagePack) é detectado pelo primeiro byte da mensagem.
+# Aceita também um 'memoryview' (ex: uma fatia de um buffer de recepção), sem copiá-lo antes.
+def decode(data):
+    if data[:1] == _MSGPACK_PREFIX:
+        if msgpack is None:
+            raise DecodeError("Mensagem em MessagePack recebida, mas o pacote 'msgpack' não está instalado.")
+        return msgpack.unpackb(data[1:], raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    # O 'json' da biblioteca padrão não aceita 'memoryview'; só neste caso os dados são copiados.
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+# --- Enquadramento (framing) de mensagens TCP ---
+# O TCP é um fluxo de bytes: ele não preserva os limites entre mensagens. Para que várias
+# requisições possam trafegar pela mesma conexão, cada mensagem é precedida por um
+# cabeçalho de 4 bytes (inteiro sem sinal, big-endian) com o tamanho do conteúdo.
+# O formato é público para que quem monta a mensagem em um buffer próprio possa usar 'pack_into'.
+FRAME_HEADER = struct.Struct('!I')
+
+# Monta uma mensagem completa: cabeçalho com o tamanho seguido do conteúdo.
+def pack_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+# Percorre uma sequência de mensagens já montadas com 'pack_frame' e concatenadas em um único
+# bloco de bytes (ex: o snapshot de estado enviado ao backup), retornando o conteúdo de cada uma.
+def unpack_frames(data):
+    offset = 0
+    end = len(data)
+    while offset < end:
+        if end - offset < FRAME_HEADER.size:
+            raise DecodeError("Sequência de mensagens truncada.")
+        (length,) = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        if end - offset < length:
+            raise DecodeError("Sequência de mensagens truncada.")
+        yield data[offset:offset + length]
+        offset += length
+
+# Envia uma mensagem completa (cabeçalho + conteúdo) pelo socket.
+# 'sendmsg' entrega o cabeçalho e o conteúdo ao kernel em uma única chamada, a partir dos dois buffers
+# separados (como o 'writev' do C), sem copiar o conteúdo para concatená-lo ao cabeçalho.
+# Objetos sem 'sendmsg' (ex: em sistemas que não o oferecem) usam o 'sendall' com a mensagem montada.
+def send_frame(sock, payload: bytes):
+    header = FRAME_HEADER.pack(len(payload))
+    sendmsg = getattr(sock, "sendmsg", None)
+    if sendmsg is None:
+        sock.sendall(header + payload)
+        return
+    sent = sendmsg([header, payload])
+    # Assim como 'send', 'sendmsg' pode enviar só uma parte; o restante segue com 'sendall'.
+    if sent < FRAME_HEADER.size:
+        sock.sendall(header[sent:])
+        sent = FRAME_HEADER.size
+    if sent - FRAME_HEADER.size < len(payload):
+        sock.sendall(memoryview(payload)[sent - FRAME_HEADER.size:])
+
+# Preenche todo o buffer 'view' com dados lidos do socket.
+# 'recv_into' escreve direto no buffer já alocado, sem criar um objeto 'bytes' novo a cada leitura.
+# Retorna False se a conexão for encerrada antes do primeiro byte.
+def _recv_into_exactly(sock, view) -> bool:
+    received = 0
+    total = len(view)
+    while received < total:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            if received == 0:
+                return False
+            # A conexão caiu no meio de uma mensagem: os dados recebidos estão incompletos.
+            raise ConnectionResetError("Conexão encerrada no meio de uma mensagem.")
+        received += n
+    return True
+
+# Recebe uma mensagem completa do socket e retorna seu conteúdo (como 'bytearray').
+# Retorna None quando o outro lado fecha a conexão de forma limpa (entre duas mensagens).
+def recv_frame(sock):
+    header = bytearray(FRAME_HEADER.size)
+    if not _recv_into_exactly(sock, memoryview(header)):
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    # O tamanho vem do outro lado da conexão: é verificado antes de alocar o buffer.
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionResetError(f"Mensagem de {length} bytes excede o limite de {MAX_FRAME_SIZE} bytes.")
+    # O buffer da mensagem é alocado uma única vez, já com o tamanho exato informado no cabeçalho.
+    payload = bytearray(length)
+    if length and not _recv_into_exactly(sock, memoryview(payload)):
+        raise ConnectionResetError("Conexão encerrada no meio de uma mensagem.")
+    return payload
+
+# Versão assíncrona de 'recv_frame', para uso com os streams do 'asyncio' (asyncio.StreamReader).
+# Retorna None quando o outro lado fecha a conexão de forma limpa (entre duas mensagens).
+async def recv_frame_async(reader):
+    # Importado aqui, e não no topo do arquivo, porque o 'asyncio' é pesado de carregar e a
+    # maioria dos comandos não precisa dele.
+    import asyncio
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ConnectionResetError("Conexão encerrada no meio de uma mensagem.")
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionResetError(f"Mensagem de {length} bytes excede o limite de {MAX_FRAME_SIZE} bytes.")
+    try:
+        return await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ConnectionResetError("Conexão encerrada no meio de uma mensagem.")
@@ -10,7 +10,9 @@ from typing import Dict, Any
 # O decorador @dataclass automaticamente gera métodos especiais para a classe,
 # como __init__(), __repr__(), __eq__(), etc. Isso simplifica a criação de classes
 # cujo principal objetivo é armazenar dados.
-@dataclass
+# 'slots=True' guarda os atributos em posições fixas em vez de um '__dict__' por objeto:
+# cada tarefa ocupa menos memória e o acesso aos atributos fica mais rápido.
+@dataclass(slots=True)
 class Task:
     """
     Representa uma única unidade de trabalho (tarefa) no sistema.
@@ -46,4 +48,36 @@ class Task:
     
     # Armazena o resultado da tarefa após sua conclusão.
     # Pode ser qualquer tipo de dado ('Any').
-    result: Any = None
\ No newline at end of file
+    result: Any = None
+
+    # Converte a tarefa em um dicionário, pronto para ser serializado e enviado pela rede.
+    # Com 'slots=True' não existe mais o '__dict__'. Os campos são listados diretamente, o que é
+    # mais rápido que 'dataclasses.asdict', que copia recursivamente também o dicionário 'data'.
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "client_id": self.client_id,
+            "status": self.status,
+            "data": self.data,
+            "lamport_ts": self.lamport_ts,
+            "assigned_worker": self.assigned_worker,
+            "result": self.result,
+        }
+
+# Tipos de trabalho simulado aceitos pelo worker (ver 'worker/task_executor.py').
+TASK_MODES = ("sleep", "cpu")
+
+# Verifica os dados de uma tarefa antes de ela ser enviada ou aceita.
+# Retorna uma mensagem descrevendo o problema, ou None se os dados forem válidos.
+# Sem essa verificação, uma duração como "x" só falharia no worker, depois de a tarefa já ter sido distribuída.
+def validate_task_data(data) -> str | None:
+    if not isinstance(data, dict):
+        return "os dados da tarefa devem ser um objeto"
+    duration = data.get("duration", 5)
+    # 'bool' é uma subclasse de 'int' em Python, mas 'true' não é uma duração.
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)) or not duration >= 0:
+        return f"duração inválida: {duration!r} (deve ser um número maior ou igual a zero)"
+    mode = data.get("mode", "sleep")
+    if mode not in TASK_MODES:
+        return f"modo inválido: {mode!r} (deve ser {' ou '.join(TASK_MODES)})"
+    return None
@@ -2,110 +2,340 @@
 
 # --- Importações de Bibliotecas Padrão ---
 import socket  # Para comunicação de rede (TCP para receber tarefas, UDP para enviar status).
-import threading  # Para rodar o envio de heartbeats em segundo plano.
-import json  # Para serializar/desserializar as mensagens trocadas com o orquestrador.
-import time  # Usado para simular o tempo de execução de uma tarefa.
-import sys  # Para ler argumentos da linha de comando (host e porta do worker).
+import os  # Para fixar o worker em um núcleo da CPU (opção '--cpu').
+import asyncio  # Para atender a conexão de tarefas, executar as tarefas e enviar heartbeats em um único loop de eventos.
+import argparse  # Para ler argumentos da linha de comando (host, porta e número de workers).
+import multiprocessing  # Para iniciar vários workers em processos separados (opção '--workers').
+import time  # Para saber há quanto tempo o orquestrador recebeu a última mensagem deste worker.
+import logging  # Para registrar o andamento das tarefas e eventuais erros.
 
 # --- Importações do Projeto ---
-# Importa todas as variáveis de configuração (endereços, portas, timeouts, logger).
-# O asterisco (*) importa tudo, mas foi corrigido para importar apenas o necessário nos passos anteriores.
-from config import ORCHESTRATOR_HOST, WORKER_PORT, HEARTBEAT_INTERVAL, logging
-
-# Função que simula a execução de uma tarefa.
-def execute_task(task_data):
-    logging.info(f"Iniciando execução da tarefa: {task_data['id']}")
-    # Simula um trabalho pesado "dormindo" por um tempo.
-    # A duração é pega dos dados da tarefa, com um padrão de 5 segundos se não for especificada.
-    duration = task_data.get('data', {}).get('duration', 5)
-    time.sleep(duration)
-    # Cria um dicionário com o resultado da tarefa.
-    result = {"message": f"Tarefa {task_data['id']} concluída com sucesso"}
-    logging.info(f"Tarefa {task_data['id']} finalizada.")
-    # Retorna o resultado.
-    return result
-
-# Função que roda em uma thread separada para enviar "sinais de vida" (heartbeats) ao orquestrador.
-def send_heartbeat(worker_id):
-    # Define o endereço do orquestrador para onde os heartbeats serão enviados.
-    orchestrator_addr = (ORCHESTRATOR_HOST, WORKER_PORT)
-    # Cria um socket UDP (mais leve que TCP, ideal para mensagens curtas e repetitivas).
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-        # Loop infinito para enviar heartbeats continuamente.
-        while True:
-            try:
-                # Monta a mensagem do heartbeat em formato JSON.
-                message = json.dumps({"type": "heartbeat", "worker_id": worker_id})
-                # Envia a mensagem para o orquestrador.
-                s.sendto(message.encode('utf-8'), orchestrator_addr)
-            except Exception as e:
-                # Loga um erro se o envio falhar, mas não quebra o loop.
-                logging.error(f"Erro ao enviar heartbeat: {e}")
-            # Espera pelo intervalo definido em 'config.py' antes de enviar o próximo.
-            time.sleep(HEARTBEAT_INTERVAL)
+# Importa as variáveis de configuração necessárias (endereços, portas, intervalos) e a configuração do logging.
+from config import ORCHESTRATOR_HOST, WORKER_PORT, HEARTBEAT_INTERVAL, WORKER_BUSY_POLL_US, MAX_FRAME_SIZE, configure_logging
+# Serialização (JSON ou MessagePack, conforme WIRE_FORMAT) e leitura de mensagens com tamanho,
+# compartilhadas com o orquestrador.
+from shared.communication import encode, decode, DecodeError, FRAME_HEADER
+# A execução (simulada) das tarefas.
+from worker.task_executor import execute_task
+
+# Endereço do orquestrador, para onde vão os heartbeats e as notificações de conclusão.
+# Montado uma única vez, e não a cada mensagem enviada. O nome do host não é resolvido aqui:
+# cada 'sendto' o resolve, então o worker acompanha o orquestrador se o nome passar a apontar
+# para outra máquina (ex: o backup, após um failover).
+_ORCH_ADDR = (ORCHESTRATOR_HOST, WORKER_PORT)
+
+# Flag que cria o socket já em modo não bloqueante, na própria chamada de criação, sem uma chamada
+# extra ao sistema para mudar o modo depois. Só existe no Linux; nos demais sistemas vale 0 e o modo
+# é alterado com 'setblocking'. (O 'FD_CLOEXEC' o Python já aplica na criação, com SOCK_CLOEXEC.)
+_SOCK_NONBLOCK = getattr(socket, "SOCK_NONBLOCK", 0)
+
+# Socket UDP único, criado uma vez e reaproveitado por todas as mensagens enviadas ao orquestrador
+# (heartbeats e notificações de conclusão), em vez de abrir e fechar um socket a cada envio.
+# Ele é não bloqueante: um 'sendto' nunca pode parar o loop de eventos, que atende todo o worker.
+_udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM | _SOCK_NONBLOCK)
+if not _SOCK_NONBLOCK:
+    _udp_sock.setblocking(False)
+# Aumenta o buffer de envio do kernel (1 MB) para que uma rajada de notificações não encontre o buffer cheio.
+_udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1024 * 1024)
+
+# Número da opção SO_BUSY_POLL no Linux. O módulo 'socket' só a expõe em versões recentes do Python.
+_SO_BUSY_POLL = getattr(socket, "SO_BUSY_POLL", 46)
+
+# Momento (relógio monotônico) do último envio de uma mensagem ao orquestrador.
+# Qualquer mensagem enviada prova que o worker está vivo, então o heartbeat só é necessário
+# quando nada foi enviado durante um intervalo inteiro.
+_last_send = 0.0
+
+# Notificações de conclusão ainda não enviadas, como triplas (ID da tarefa, resultado, status).
+# Conclusões próximas no tempo são agrupadas e enviadas em um único datagrama (ver '_flush_completions').
+# Não precisa de Lock: só é acessada pelo loop de eventos, que roda em uma única thread.
+_pending_completions = []
+# Número máximo de conclusões em um mesmo datagrama.
+_COMPLETION_BATCH_MAX = 64
+# Tempo máximo (em segundos) que uma notificação espera por outras antes de ser enviada.
+_COMPLETION_FLUSH_DELAY = 0.001
+# Tempo (em segundos) até uma nova tentativa quando o buffer de envio do kernel está cheio.
+_COMPLETION_RETRY_DELAY = 0.01
+
+# Tarefas em execução. O loop de eventos guarda apenas referências fracas às tarefas criadas com
+# 'create_task', então elas são mantidas aqui até terminarem para não serem descartadas no meio.
+_running = set()
+
+# Corrotina que envia "sinais de vida" (heartbeats) ao orquestrador, em paralelo com as tarefas.
+async def send_heartbeat(worker_id):
+    # A mensagem do heartbeat é sempre a mesma (o ID do worker não muda), então ela é
+    # serializada uma única vez aqui; dentro do loop resta apenas a chamada de envio.
+    message = encode({"type": "heartbeat", "worker_id": worker_id})
+    global _last_send
+    # Variáveis locais evitam a busca dos atributos (e das variáveis globais) a cada volta do loop.
+    sendto = _udp_sock.sendto
+    monotonic = time.monotonic
+    sleep = asyncio.sleep
+    # Loop infinito para enviar heartbeats continuamente, pelo socket UDP compartilhado
+    # (UDP é mais leve que TCP, ideal para mensagens curtas e repetitivas).
+    while True:
+        # Tempo que ainda falta para completar um intervalo desde a última mensagem enviada.
+        # Um worker ocupado, que notifica conclusões com frequência, quase nunca precisa enviar heartbeats.
+        remaining = HEARTBEAT_INTERVAL - (monotonic() - _last_send)
+        if remaining > 0:
+            await sleep(remaining)
+            continue
+        try:
+            # Envia a mensagem já pronta para o orquestrador.
+            sendto(message, _ORCH_ADDR)
+            _last_send = monotonic()
+        except BlockingIOError:
+            # O buffer de envio do kernel está cheio. Como o socket não é bloqueante, o heartbeat é
+            # descartado em vez de travar o loop; o próximo sai em HEARTBEAT_INTERVAL, então não é um erro.
+            logging.debug("Buffer de envio cheio: heartbeat descartado.")
+        except Exception as e:
+            # Loga um erro se o envio falhar, mas não quebra o loop.
+            logging.error("Erro ao enviar heartbeat: %s", e)
+        # Espera pelo intervalo definido em 'config.py' antes de enviar o próximo.
+        await sleep(HEARTBEAT_INTERVAL)
 
 # Função para notificar o orquestrador que uma tarefa foi concluída.
-def notify_task_completion(task_id, result):
-    # Define o endereço do orquestrador.
-    orchestrator_addr = (ORCHESTRATOR_HOST, WORKER_PORT)
-    # Usa um socket UDP para enviar uma notificação "dispare e esqueça".
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-        # Monta a mensagem de conclusão com o ID da tarefa e seu resultado.
-        message = json.dumps({
+# A notificação não é enviada na hora: ela aguarda até '_COMPLETION_FLUSH_DELAY' segundos para ser
+# agrupada com as conclusões seguintes, e o grupo inteiro segue em um único 'sendto'.
+# Uma tarefa que terminou com erro também é notificada, com o status "FAILED" e a mensagem do erro.
+def notify_task_completion(worker_id, task_id, result, status="COMPLETED"):
+    _pending_completions.append((task_id, result, status))
+    if len(_pending_completions) >= _COMPLETION_BATCH_MAX:
+        # O grupo está cheio: envia imediatamente.
+        _flush_completions(worker_id)
+    elif len(_pending_completions) == 1:
+        # Primeira notificação de um novo grupo: agenda o envio.
+        asyncio.get_running_loop().call_later(_COMPLETION_FLUSH_DELAY, _flush_completions, worker_id)
+
+# Envia as notificações de conclusão pendentes ao orquestrador.
+# A mensagem inclui o ID do worker e também vale como heartbeat.
+def _flush_completions(worker_id):
+    global _last_send
+    # O grupo pode já ter sido enviado por estar cheio antes do horário agendado.
+    if not _pending_completions:
+        return
+    # No máximo '_COMPLETION_BATCH_MAX' conclusões por datagrama; as restantes seguem logo depois.
+    batch = _pending_completions[:_COMPLETION_BATCH_MAX]
+    del _pending_completions[:_COMPLETION_BATCH_MAX]
+    # Monta a mensagem, já em bytes. Uma conclusão sozinha usa a mensagem simples 'task_complete';
+    # várias seguem juntas em 'task_complete_batch'.
+    if len(batch) == 1:
+        task_id, result, status = batch[0]
+        message = encode({
             "type": "task_complete",
+            "worker_id": worker_id,
             "task_id": task_id,
-            "result": result
+            "result": result,
+            "status": status
         })
-        # Envia a notificação.
-        s.sendto(message.encode('utf-8'), orchestrator_addr)
-        logging.info(f"Notificação de conclusão da tarefa {task_id} enviada.")
+    else:
+        message = encode({
+            "type": "task_complete_batch",
+            "worker_id": worker_id,
+            "tasks": [{"task_id": task_id, "result": result, "status": status} for task_id, result, status in batch]
+        })
+    # Envia a notificação "dispare e esqueça" pelo socket UDP compartilhado.
+    loop = asyncio.get_running_loop()
+    try:
+        _udp_sock.sendto(message, _ORCH_ADDR)
+    except BlockingIOError:
+        # O buffer de envio do kernel está cheio (o socket não é bloqueante). Diferente de um heartbeat,
+        # uma conclusão não pode ser descartada: a tarefa ficaria "em andamento" para sempre no orquestrador.
+        # O grupo volta para o início da fila, na mesma ordem, e o envio é tentado de novo em seguida.
+        _pending_completions[:0] = batch
+        loop.call_later(_COMPLETION_RETRY_DELAY, _flush_completions, worker_id)
+        return
+    except OSError as e:
+        logging.error("Erro ao enviar a conclusão de %d tarefa(s): %s", len(batch), e)
+        return
+    _last_send = time.monotonic()
+    # Conclusões que não couberam neste datagrama vão no próximo.
+    if _pending_completions:
+        loop.call_soon(_flush_completions, worker_id)
+    # A lista de IDs só é montada se a mensagem for de fato registrada (nível INFO habilitado).
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("Notificação de conclusão enviada para %d tarefa(s): %s", len(batch), ", ".join(t for t, _, _ in batch))
+
+# Executa uma tarefa e notifica o orquestrador da conclusão.
+async def _run_task(worker_id, task_data):
+    try:
+        # Chama a função para executar a tarefa.
+        result = await execute_task(task_data)
+        # Após a conclusão, notifica o orquestrador.
+        notify_task_completion(worker_id, task_data['id'], result)
+    except Exception as e:
+        # Sem este tratamento, o erro ficaria guardado na tarefa do asyncio e ninguém o veria.
+        logging.error("Erro ao executar a tarefa %s: %s", task_data.get('id'), e)
+        # O orquestrador também precisa saber da falha: sem a notificação, a tarefa ficaria
+        # "em andamento" para sempre, já que este worker continua enviando heartbeats.
+        if 'id' in task_data:
+            notify_task_completion(worker_id, task_data["id"], {"error": str(e)}, "FAILED")
+
+# Atende uma conexão do orquestrador: lê as tarefas enviadas por ela e inicia a execução de cada uma.
+# Como 'BufferedProtocol', o próprio protocolo fornece o buffer onde o asyncio escreve os dados
+# recebidos ('recv_into'), então nenhum objeto 'bytes' novo é criado a cada leitura do socket.
+class _TaskProtocol(asyncio.BufferedProtocol):
+    def __init__(self, worker_id):
+        # ID deste worker, enviado nas notificações de conclusão das tarefas.
+        self._worker_id = worker_id
+        # Buffer pré-alocado e reaproveitado durante toda a conexão.
+        self._buf = bytearray(64 * 1024)
+        self._view = memoryview(self._buf)
+        # Os dados recebidos e ainda não processados ficam entre '_start' e '_end'.
+        self._start = 0
+        self._end = 0
+        self._addr = None
+        self._transport = None
 
+    def connection_made(self, transport):
+        self._transport = transport
+        self._addr = transport.get_extra_info("peername")
+        # Se configurado, ativa o busy polling nesta conexão (ver WORKER_BUSY_POLL_US em 'config.py').
+        # A opção é só uma otimização: se o sistema não a suportar ou negar a permissão, segue sem ela.
+        if WORKER_BUSY_POLL_US:
+            try:
+                transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, WORKER_BUSY_POLL_US)
+            except OSError as e:
+                logging.warning("Não foi possível ativar SO_BUSY_POLL na conexão com %s: %s", self._addr, e)
+
+    # Chamado pelo asyncio antes de cada leitura: retorna a parte livre do buffer.
+    def get_buffer(self, sizehint):
+        if self._end == len(self._buf):
+            # O final do buffer está ocupado: move os dados pendentes (uma mensagem incompleta)
+            # para o início, liberando espaço sem alocar um buffer novo.
+            pending = self._end - self._start
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    # Chamado pelo asyncio depois que 'nbytes' bytes foram escritos no buffer.
+    def buffer_updated(self, nbytes):
+        self._end += nbytes
+        view = self._view
+        # O orquestrador mantém a conexão aberta e envia várias tarefas por ela, uma após a outra.
+        # Cada tarefa é precedida por um cabeçalho com o seu tamanho, então uma tarefa grande
+        # ou dividida em vários pacotes TCP é processada só quando chega por inteiro.
+        while self._end - self._start >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(view, self._start)
+            begin = self._start + FRAME_HEADER.size
+            # O tamanho vem do cabeçalho enviado pela rede: um valor acima do limite (corrompido ou
+            # malicioso) encerra a conexão em vez de alocar um buffer desse tamanho.
+            if length > MAX_FRAME_SIZE:
+                logging.error("Mensagem de %d bytes recebida de %s excede o limite de %d bytes. Encerrando a conexão.",
+                              length, self._addr, MAX_FRAME_SIZE)
+                self._start = self._end = 0
+                self._transport.close()
+                return
+            if self._end - begin < length:
+                # Mensagem incompleta. Se ela não couber no buffer, ele é trocado por um maior,
+                # e os dados já recebidos são copiados para o início do novo buffer.
+                if FRAME_HEADER.size + length > len(self._buf):
+                    buf = bytearray(FRAME_HEADER.size + length)
+                    buf[:self._end - self._start] = view[self._start:self._end]
+                    self._buf, self._view = buf, memoryview(buf)
+                    self._start, self._end = 0, self._end - self._start
+                break
+            self._start = begin + length
+            # Converte a tarefa em um dicionário Python direto do buffer, sem copiá-la antes
+            # (o formato, JSON ou MessagePack, é detectado).
+            try:
+                task_data = decode(view[begin:self._start])
+            except DecodeError as e:
+                logging.error("Tarefa inválida recebida de %s: %s", self._addr, e)
+                continue
+            # A tarefa é executada em segundo plano e a leitura da próxima continua imediatamente.
+            # Assim as tarefas enviadas pela mesma conexão não esperam umas pelas outras.
+            task = asyncio.create_task(_run_task(self._worker_id, task_data))
+            _running.add(task)
+            task.add_done_callback(_running.discard)
+        # Tudo o que foi recebido já foi processado: a próxima leitura começa no início do buffer.
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    # Chamado quando a conexão é encerrada (pelo orquestrador ou por um erro).
+    def connection_lost(self, exc):
+        if self._end != self._start:
+            logging.error("Conexão com %s encerrada antes de receber a tarefa: %s", self._addr, exc)
+
+# Cria o socket TCP que recebe as tarefas, já configurado, para ser entregue ao servidor do asyncio.
+def _create_task_socket(host, port):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM | _SOCK_NONBLOCK)
+    # Permite reiniciar o worker na mesma porta logo após encerrá-lo (sem esperar o TIME_WAIT).
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Aumenta o buffer de recepção do kernel (4 MB). Ele precisa ser definido antes do 'listen()'
+    # para valer também para as conexões aceitas, que herdam as opções do socket de escuta.
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    s.bind((host, port))
+    s.listen()
+    if not _SOCK_NONBLOCK:
+        s.setblocking(False)
+    return s
 
 # Função principal do worker que ouve por novas tarefas do orquestrador.
-def listen_for_tasks(host, port):
-    # Cria um socket TCP para receber as tarefas (TCP é confiável para dados importantes).
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        # Associa o socket ao endereço e porta especificados na inicialização.
-        s.bind((host, port))
-        # Coloca o socket em modo de escuta por conexões.
-        s.listen()
-        logging.info(f"Ouvindo por tarefas em {host}:{port}")
-        # Loop infinito para aceitar conexões de tarefas.
-        while True:
-            # Aceita uma nova conexão (esta chamada é bloqueante).
-            conn, addr = s.accept()
-            with conn:
-                # Recebe os dados da tarefa.
-                data = conn.recv(4096).decode('utf-8')
-                if not data:
-                    continue
-                
-                # Converte os dados JSON em um dicionário Python.
-                task_data = json.loads(data)
-                # Chama a função para executar a tarefa.
-                result = execute_task(task_data)
-                
-                # Após a conclusão, notifica o orquestrador.
-                notify_task_completion(task_data['id'], result)
+async def listen_for_tasks(host, port, worker_id):
+    # Inicia o envio de heartbeats no mesmo loop de eventos que atende as tarefas.
+    # A variável local mantém a referência à tarefa enquanto o worker estiver rodando.
+    heartbeat = asyncio.create_task(send_heartbeat(worker_id))
+    # Cria o servidor TCP que recebe as tarefas (TCP é confiável para dados importantes).
+    # Cada conexão aceita é atendida por uma instância de '_TaskProtocol'. O asyncio já desativa
+    # o algoritmo de Nagle (TCP_NODELAY) em cada conexão aceita.
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: _TaskProtocol(worker_id), sock=_create_task_socket(host, port))
+    logging.info("Ouvindo por tarefas em %s:%s", host, port)
+    async with server:
+        await server.serve_forever()
 
 
-# Ponto de entrada do script.
-if __name__ == "__main__":
-    # Verifica se os argumentos da linha de comando (host e porta) foram fornecidos.
-    if len(sys.argv) != 3:
-        print("Uso: python -m worker.main <host> <port>")
-        sys.exit(1)
-        
-    # Pega o host e a porta dos argumentos.
-    host = sys.argv[1]
-    port = int(sys.argv[2])
+# Roda um worker completo (tarefas e heartbeats) em um único loop de eventos.
+# O envio de heartbeats não precisa de uma thread própria: ele é intercalado com as tarefas
+# pelo loop, que espera por todos os sockets e temporizadores de uma vez (epoll, no Linux).
+def run_worker(host, port, cpu=None):
+    # Configura o formato e o nível dos logs (também nos processos filhos criados com '--workers').
+    configure_logging()
+    # Se pedido, fixa o processo em um único núcleo. O processamento dos pacotes pelo kernel e o código do
+    # worker passam a usar o mesmo cache; o ideal é escolher um núcleo próximo ao que atende as interrupções
+    # da placa de rede (ver /proc/irq/<irq>/smp_affinity). Disponível apenas no Linux.
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            logging.info("Worker fixado na CPU %d.", cpu)
+        except (AttributeError, OSError) as e:
+            logging.warning("Não foi possível fixar o worker na CPU %s: %s", cpu, e)
     # Cria um ID único para este worker.
     worker_id = f"{host}_{port}"
-    
-    # Cria e inicia uma nova thread para a função 'send_heartbeat'.
-    # Isso é crucial para que o worker possa enviar heartbeats E ouvir por tarefas ao mesmo tempo.
-    # 'daemon=True' garante que esta thread será encerrada quando o programa principal terminar.
-    threading.Thread(target=send_heartbeat, args=(worker_id,), daemon=True, name=f"Heartbeat-{worker_id}").start()
-    
-    # Chama a função de escuta de tarefas, que rodará na thread principal do programa.
-    listen_for_tasks(host, port)
\ No newline at end of file
+    asyncio.run(listen_for_tasks(host, port, worker_id))
+
+
+# Ponto de entrada do script.
+if __name__ == "__main__":
+    # Lê os argumentos da linha de comando: host e porta do worker e, opcionalmente, o número de processos.
+    parser = argparse.ArgumentParser(description="Worker da plataforma distribuída.")
+    parser.add_argument("host", type=str, help="Host em que o worker recebe tarefas.")
+    parser.add_argument("port", type=int, help="Porta em que o worker recebe tarefas.")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Número de workers (processos) a iniciar, nas portas port, port+1, ...")
+    parser.add_argument("-c", "--cpu", type=int, default=None,
+                        help="Núcleo da CPU em que o worker será fixado (com --workers, os seguintes usam cpu+1, cpu+2, ...).")
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        # Um único worker, rodando neste mesmo processo.
+        run_worker(args.host, args.port, args.cpu)
+    else:
+        # Cada processo tem seu próprio interpretador (e seu próprio GIL), então vários workers em
+        # processos separados usam vários núcleos. Cada um ouve em uma porta diferente e se registra no
+        # orquestrador como um worker independente, com o seu próprio ID ('host_porta') e heartbeat.
+        # As portas não são compartilhadas (SO_REUSEPORT) porque o orquestrador identifica cada worker
+        # pela porta e mantém uma única conexão com ele: todas as tarefas iriam para o mesmo processo.
+        processes = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(args.host, args.port + i, None if args.cpu is None else args.cpu + i),
+                name=f"Worker-{args.port + i}",
+            )
+            for i in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
@@ -1,20 +1,45 @@
-# Importa o módulo 'time', que fornece funções relacionadas ao tempo.
-# Neste caso, será usado para a função 'sleep', que pausa a execução do programa.
+# worker/task_executor.py
+
+# Importa o módulo 'asyncio': a tarefa é uma corrotina executada no loop de eventos do worker,
+# e o 'asyncio.sleep' pausa apenas esta tarefa, sem bloquear as demais.
+import asyncio
+# Importa o módulo 'hashlib' para simular trabalho de CPU: ao calcular o hash de blocos grandes,
+# ele libera o GIL, então várias tarefas desse tipo podem usar vários núcleos ao mesmo tempo.
+import hashlib
+# Importa o módulo 'time' para limitar o trabalho de CPU pela duração pedida.
 import time
+# Importa o módulo 'logging' para registrar o início e o fim de cada tarefa.
+# As mensagens usam argumentos ('%s') em vez de f-strings: o texto só é montado se o nível
+# de log estiver habilitado, e não a cada tarefa.
+import logging
+
+# Bloco de dados (1 MB) usado pelo trabalho de CPU simulado, alocado uma única vez.
+_CPU_BLOCK = bytes(1024 * 1024)
+
+# Simula trabalho de CPU por 'duration' segundos, calculando hashes repetidamente.
+# Roda em uma thread separada: o GIL fica liberado durante cada 'update' e o loop de eventos não é bloqueado.
+def _burn_cpu(duration):
+    h = hashlib.sha256()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        h.update(_CPU_BLOCK)
 
 # Define a função que simula a execução de uma tarefa.
-# Ela recebe um dicionário 'task_data' com os detalhes da tarefa.
-def execute_task(task_data):
-    # Imprime uma mensagem no console indicando o início da tarefa, usando o 'id' da tarefa.
-    print(f"Iniciando tarefa: {task_data['id']}...")
-    
-    # Pausa a execução da thread para simular um trabalho que leva tempo.
-    # 'task_data.get('duration', 10)' busca o valor da chave 'duration' no dicionário.
-    # Se a chave 'duration' não for encontrada, ele usa o valor padrão de 10 segundos.
-    time.sleep(task_data.get('duration', 10))
-    
-    # Imprime uma mensagem indicando que a tarefa foi finalizada.
-    print(f"Tarefa {task_data['id']} concluída.")
-    
-    # Retorna um dicionário simples para indicar o status de conclusão da tarefa.
-    return {'status': 'completed'}
\ No newline at end of file
+# Ela recebe um dicionário 'task_data' com os detalhes da tarefa (o formato de 'Task.to_dict()').
+async def execute_task(task_data):
+    logging.info("Iniciando execução da tarefa: %s", task_data['id'])
+    # Os dados enviados pelo cliente ('data') definem a duração, com um padrão de 5 segundos,
+    # e o tipo de trabalho simulado: "sleep" (padrão, apenas espera) ou "cpu" (usa o processador).
+    data = task_data.get('data', {})
+    duration = data.get('duration', 5)
+    if data.get('mode') == "cpu":
+        # O cálculo é feito em uma das threads do executor padrão do loop de eventos.
+        await asyncio.get_running_loop().run_in_executor(None, _burn_cpu, duration)
+    else:
+        # Simula um trabalho pesado "dormindo" por um tempo.
+        await asyncio.sleep(duration)
+    # Cria um dicionário com o resultado da tarefa.
+    result = {"message": f"Tarefa {task_data['id']} concluída com sucesso"}
+    logging.info("Tarefa %s finalizada.", task_data['id'])
+    # Retorna o resultado.
+    return result